@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from api.models.Account import Account
+from api.search import TrigramSearchAdminMixin
 
 @admin.register(Account)
-class AccountAdmin(admin.ModelAdmin):
+class AccountAdmin(TrigramSearchAdminMixin, admin.ModelAdmin):
     list_display = [
         'id',
         'user_display',
@@ -26,11 +27,12 @@ class AccountAdmin(admin.ModelAdmin):
     ]
     
     search_fields = [
+        '=id',
+        '=account_number',
+        'account_number',
         'user__username',
         'user__email',
-        'email',
-        'phone_number',
-        'id'
+        'phone_number'
     ]
     
     readonly_fields = [
@@ -137,7 +139,7 @@ class AccountAdmin(admin.ModelAdmin):
     
     def account_summary(self, obj):
         customer_exists = hasattr(obj, 'customer')
-        total_loans = obj.customer.loan_set.count() if customer_exists else 0
+        total_loans = obj.total_loans if customer_exists else 0
         
         return format_html(
             '<table style="width:100%;">'
@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Count, Sum
+from django.db.models import Count, Q, Sum
 from api.models.Customer import Customer
+from api.search import TrigramSearchAdminMixin
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(TrigramSearchAdminMixin, admin.ModelAdmin):
     list_display = [
         'id',
         'full_name',
@@ -26,11 +27,12 @@ class CustomerAdmin(admin.ModelAdmin):
     ]
     
     search_fields = [
+        '=id',
+        '=sa_id_number',
         'first_name',
         'last_name',
-        'account__email',
+        'account__user__email',
         'account__phone_number',
-        'national_id',
         'city',
         'address'
     ]
@@ -107,6 +109,7 @@ class CustomerAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
     list_per_page = 50
+    list_select_related = ['account']
     
     # Custom display methods
     def full_name(self, obj):
@@ -127,14 +130,16 @@ class CustomerAdmin(admin.ModelAdmin):
     location.short_description = 'Location'
     
     def total_loans(self, obj):
-        count = obj.loan_set.count()
+        count = obj.account.total_loans
         return format_html('<strong>{}</strong>', count)
     total_loans.short_description = 'Total Loans'
+    total_loans.admin_order_field = 'account__total_loans'
     
     def total_loan_amount(self, obj):
-        total = obj.loan_set.aggregate(Sum('amount'))['amount__sum'] or 0
+        total = obj.account.loan_amount
         return format_html('R {:,.2f}', total)
     total_loan_amount.short_description = 'Total Amount'
+    total_loan_amount.admin_order_field = 'account__loan_amount'
     
     def account_status(self, obj):
         if hasattr(obj, 'account'):
@@ -149,11 +154,14 @@ class CustomerAdmin(admin.ModelAdmin):
     account_status.short_description = 'Status'
     
     def customer_statistics(self, obj):
-        loans = obj.loan_set.all()
-        total_loans = loans.count()
-        active_loans = loans.filter(status='ACTIVE').count()
-        total_borrowed = loans.aggregate(Sum('amount'))['amount__sum'] or 0
-        total_remaining = loans.aggregate(Sum('remaining_balance'))['remaining_balance__sum'] or 0
+        total_loans = obj.account.total_loans
+        total_borrowed = obj.account.loan_amount
+        figures = obj.loan_set.aggregate(
+            active_loans=Count('id', filter=Q(status='ACTIVE')),
+            total_remaining=Sum('remaining_balance'),
+        )
+        active_loans = figures['active_loans']
+        total_remaining = figures['total_remaining'] or 0
         
         return format_html(
             '<table style="width:100%;">'
@@ -2,10 +2,13 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Sum, Count, Q
 from api.models.Loan import Loan
+from api.search import TrigramSearchAdminMixin
 from api.utils.websocket_utils import trigger_loan_status_change
+from api.utils.loan_stats import bulk_update_status
+from api.utils.loan_transitions import bulk_transition
 
 @admin.register(Loan)
-class LoanAdmin(admin.ModelAdmin):
+class LoanAdmin(TrigramSearchAdminMixin, admin.ModelAdmin):
     list_display = [
         'id',
         'borrower_name',
@@ -29,10 +32,9 @@ class LoanAdmin(admin.ModelAdmin):
     ]
     
     search_fields = [
+        '=id',
         'borrower__first_name',
         'borrower__last_name',
-        'borrower__account__email',
-        'id',
         'purpose_description'
     ]
     
@@ -167,33 +169,27 @@ class LoanAdmin(admin.ModelAdmin):
     
     # Admin actions
     def approve_loans(self, request, queryset):
-        updated = queryset.filter(status='PENDING').update(status='APPROVED')
-        for loan in queryset.filter(status='APPROVED'):
-            trigger_loan_status_change(loan, 'APPROVED', 'Your loan has been approved!')
-        self.message_user(request, f'{updated} loans approved successfully.')
+        updated, _ = bulk_transition(queryset.values_list('pk', flat=True), 'APPROVED')
+        self.message_user(request, f'{len(updated)} loans approved successfully.')
     approve_loans.short_description = 'Approve selected loans'
     
     def reject_loans(self, request, queryset):
-        updated = queryset.filter(status='PENDING').update(status='REJECTED')
-        for loan in queryset.filter(status='REJECTED'):
-            trigger_loan_status_change(loan, 'REJECTED', 'Your loan has been rejected.')
-        self.message_user(request, f'{updated} loans rejected.')
+        updated, _ = bulk_transition(queryset.values_list('pk', flat=True), 'REJECTED')
+        self.message_user(request, f'{len(updated)} loans rejected.')
     reject_loans.short_description = 'Reject selected loans'
     
     def disburse_loans(self, request, queryset):
-        updated = queryset.filter(status='APPROVED').update(status='DISBURSED')
-        for loan in queryset.filter(status='DISBURSED'):
-            trigger_loan_status_change(loan, 'DISBURSED', 'Your loan has been disbursed!')
-        self.message_user(request, f'{updated} loans disbursed successfully.')
+        updated, _ = bulk_transition(queryset.values_list('pk', flat=True), 'DISBURSED')
+        self.message_user(request, f'{len(updated)} loans disbursed successfully.')
     disburse_loans.short_description = 'Disburse approved loans'
     
     def mark_as_active(self, request, queryset):
-        updated = queryset.filter(status='DISBURSED').update(status='ACTIVE')
+        updated = bulk_update_status(queryset.filter(status='DISBURSED'), 'ACTIVE')
         self.message_user(request, f'{updated} loans marked as active.')
     mark_as_active.short_description = 'Mark as active'
     
     def close_loans(self, request, queryset):
-        updated = queryset.update(status='CLOSED')
+        updated = bulk_update_status(queryset, 'CLOSED')
         self.message_user(request, f'{updated} loans closed.')
     close_loans.short_description = 'Close selected loans'
     
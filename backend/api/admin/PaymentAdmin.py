@@ -29,7 +29,7 @@ class PaymentAdmin(admin.ModelAdmin):
         'notes'
     ]
     
-    readonly_fields = ['created_at', 'updated_at', 'transaction_reference']
+    readonly_fields = ['created_at', 'updated_at', 'transaction_reference', 'reconciled_amount', 'reconciled_at']
     
     fieldsets = (
         ('Payment Details', {
@@ -44,7 +44,9 @@ class PaymentAdmin(admin.ModelAdmin):
         ('Transaction', {
             'fields': (
                 'transaction_reference',
-                'notes'
+                'notes',
+                'reconciled_amount',
+                'reconciled_at'
             )
         }),
         ('Metadata', {
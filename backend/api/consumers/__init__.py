@@ -1,5 +1,6 @@
 from .chat_consumer import ChatConsumer
 from .notification_consumer import NotificationConsumer
 from .loan_updates_consumer import LoanUpdatesConsumer
+from .dashboard_consumer import DashboardConsumer
 
-__all__ = ['ChatConsumer', 'NotificationConsumer', 'LoanUpdatesConsumer']
+__all__ = ['ChatConsumer', 'NotificationConsumer', 'LoanUpdatesConsumer', 'DashboardConsumer']
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from django.conf import settings
+from api.utils.dashboard_cache import cached_value
+from api.utils.dashboard_metrics import dashboard_stats, loan_status_breakdown
+
+
+class DashboardConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer for live admin dashboards
+    Sends a full snapshot on connect, then pushes only the figures that changed
+    whenever loans, payments or repayments are written
+    """
+    group_name = 'dashboard'
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        
+        if not self.user or not self.user.is_authenticated:
+            await self.close()
+            return
+        
+        self.snapshot = {}
+        self.last_push = 0
+        self.flush_task = None
+        self.min_interval = 1 / getattr(settings, 'DASHBOARD_LIVE_MAX_UPDATES_PER_SECOND', 2)
+        
+        # Join the shared dashboard group
+        await self.channel_layer.group_add(
+            self.group_name,
+            self.channel_name
+        )
+        
+        await self.accept()
+        
+        # Send the full snapshot on connect
+        self.snapshot = await self.get_snapshot()
+        self.last_push = asyncio.get_running_loop().time()
+        await self.send(text_data=json.dumps({
+            'type': 'snapshot',
+            'data': self.snapshot,
+        }))
+
+    async def disconnect(self, close_code):
+        if getattr(self, 'flush_task', None):
+            self.flush_task.cancel()
+        if hasattr(self, 'snapshot'):
+            await self.channel_layer.group_discard(
+                self.group_name,
+                self.channel_name
+            )
+
+    # Event handlers
+    async def dashboard_changed(self, event):
+        """Coalesce change events into at most one push per interval"""
+        if self.flush_task is not None:
+            return
+        
+        elapsed = asyncio.get_running_loop().time() - self.last_push
+        self.flush_task = asyncio.ensure_future(self.push_delta(max(0, self.min_interval - elapsed)))
+
+    async def push_delta(self, delay):
+        """Recompute the snapshot after a delay and send only what changed"""
+        await asyncio.sleep(delay)
+        # Events arriving while we compute schedule the next push
+        self.flush_task = None
+        self.last_push = asyncio.get_running_loop().time()
+        
+        snapshot = await self.get_snapshot()
+        delta = {}
+        for section, values in snapshot.items():
+            previous = self.snapshot.get(section, {})
+            changed = {key: value for key, value in values.items() if previous.get(key) != value}
+            if changed:
+                delta[section] = changed
+        self.snapshot = snapshot
+        
+        if delta:
+            await self.send(text_data=json.dumps({
+                'type': 'delta',
+                'data': delta,
+            }))
+
+    # Database operations
+    @database_sync_to_async
+    def get_snapshot(self):
+        """Get the live dashboard figures, shared between connections per version"""
+        return {
+            'stats': cached_value('stats', dashboard_stats),
+            'loan_status_breakdown': cached_value('loan_status_breakdown', loan_status_breakdown),
+        }
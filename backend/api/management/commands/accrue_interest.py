@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.utils.interest_accrual import ACCRUAL_CHUNK_SIZE, accrue_interest
+
+
+class Command(BaseCommand):
+    help = (
+        'Nightly job: accrue one day of scheduled interest on every disbursed or active loan. '
+        'Safe to rerun; an interrupted run resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to accrue (YYYY-MM-DD), defaults to today')
+        parser.add_argument(
+            '--from',
+            dest='from_date',
+            help='Accrue every day from this date (YYYY-MM-DD) up to --date, oldest first, to catch up missed runs'
+        )
+        parser.add_argument('--chunk-size', type=int, default=ACCRUAL_CHUNK_SIZE, help='Loans per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+            start = date.fromisoformat(options['from_date']) if options['from_date'] else end
+        except ValueError:
+            raise CommandError('--date and --from must be dates in YYYY-MM-DD format')
+        if start > end:
+            raise CommandError('--from must not be after --date')
+
+        day = start
+        while day <= end:
+            totals = accrue_interest(run_date=day, chunk_size=options['chunk_size'])
+            self.stdout.write(
+                f"{day}: accrued R {totals['amount']:,.2f} on {totals['loans']} loans "
+                f"({totals['skipped']} without a covering installment)"
+            )
+            day += timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS('Interest accrual complete.'))
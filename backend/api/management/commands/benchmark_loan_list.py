@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models.Loan import Loan
+from api.serializers.Loan import LoanSerializer, loan_list_rows, serialize_loan_rows
+
+
+class Command(BaseCommand):
+    help = 'Compare the values() loan list path with LoanSerializer and check both render the same payload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000, help='Number of loans to render per run')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per path; the best time is reported')
+
+    def handle(self, *args, **options):
+        queryset = Loan.objects.select_related('borrower__account__user').order_by('-created_at')
+        limit = options['limit']
+
+        def model_path():
+            return LoanSerializer(queryset[:limit], many=True).data
+
+        def values_path():
+            return serialize_loan_rows(loan_list_rows(queryset)[:limit])
+
+        results = {}
+        for name, render in (('serializer', model_path), ('values', values_path)):
+            best = None
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    data = render()
+                    elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = data
+            self.stdout.write(
+                f'{name:>10}: {len(data)} loans in {best * 1000:.1f} ms, {len(queries)} queries'
+            )
+
+        if [dict(item) for item in results['serializer']] != results['values']:
+            raise CommandError('The values() path does not match LoanSerializer output')
+        self.stdout.write(self.style.SUCCESS('Both paths produce identical output.'))
@@ -0,0 +1,100 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import AuditLog, Loan, Notification, Payment, Transaction
+from api.utils.keyset import before
+from chat.models.ChatMessage import ChatMessage
+
+MODELS = {
+    'loans': Loan,
+    'transactions': Transaction,
+    'payments': Payment,
+    'notifications': Notification,
+    'audit_logs': AuditLog,
+    'chat_messages': ChatMessage,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare OFFSET and keyset (created_at, id) pagination latency on a shallow and a deep page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', choices=sorted(MODELS), default='audit_logs')
+        parser.add_argument('--page', type=int, default=5000, help='Deep page number to measure')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best time is reported')
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Insert this many audit log rows first (audit logs only, they need no related rows)'
+        )
+
+    def handle(self, *args, **options):
+        model = MODELS[options['table']]
+        page_size = options['page_size']
+
+        if options['seed']:
+            if model is not AuditLog:
+                raise CommandError('--seed is only supported with --table audit_logs')
+            self._seed(options['seed'])
+
+        queryset = model.objects.order_by('-created_at', '-id')
+        deep_page = options['page']
+        offset = (deep_page - 1) * page_size
+        if queryset.count() <= offset:
+            raise CommandError(f'{model._meta.db_table} has too few rows to reach page {deep_page}')
+
+        # Position of the last row before the deep page, i.e. the cursor a
+        # client would hold after walking there
+        boundary = queryset.values('created_at', 'id')[offset - 1] if offset else None
+
+        def offset_page(start):
+            def run():
+                queryset.count()
+                return list(queryset[start:start + page_size])
+            return run
+
+        def keyset_page(position):
+            def run():
+                page = queryset.filter(before((position['created_at'], position['id']))) if position else queryset
+                return list(page[:page_size + 1])[:page_size]
+            return run
+
+        for label, offset_run, keyset_run in (
+            ('page 1', offset_page(0), keyset_page(None)),
+            (f'page {deep_page}', offset_page(offset), keyset_page(boundary)),
+        ):
+            offset_ms, offset_rows = self._best(offset_run, options['repeat'])
+            keyset_ms, keyset_rows = self._best(keyset_run, options['repeat'])
+            if [row.pk for row in offset_rows] != [row.pk for row in keyset_rows]:
+                raise CommandError(f'Offset and keyset pages differ at {label}')
+            self.stdout.write(f'{label:>12}: offset {offset_ms:8.2f} ms   keyset {keyset_ms:8.2f} ms')
+
+    def _best(self, run, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = run()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, rows
+
+    def _seed(self, count):
+        now = timezone.now()
+        created = AuditLog.objects.bulk_create(
+            [
+                AuditLog(action_type='LOGIN', action_description=f'Benchmark row {index}')
+                for index in range(count)
+            ],
+            batch_size=5000
+        )
+        # auto_now_add stamps every row with the same instant; spread them out
+        # so the benchmark walks a realistic timeline
+        for index, log in enumerate(created):
+            log.created_at = now - timedelta(seconds=count - index)
+        AuditLog.objects.bulk_update(created, ['created_at'], batch_size=1000)
+        self.stdout.write(f'Seeded {count} audit log rows.')
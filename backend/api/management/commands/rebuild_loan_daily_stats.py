@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.loan_stats import rebuild_loan_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Backfill or rebuild the LoanDailyStats rollup from the loans table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only rebuild buckets from this date onwards (YYYY-MM-DD). Rebuilds everything when omitted.'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        written = rebuild_loan_daily_stats(since=since)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} loan daily stats rows.'))
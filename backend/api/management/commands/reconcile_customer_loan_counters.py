@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.customer_counters import reconcile_customer_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Account.total_loans and Account.loan_amount from each customer's loans"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many accounts have drifted'
+        )
+
+    def handle(self, *args, **options):
+        drifted = reconcile_customer_counters(dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} accounts have drifted loan counters.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Reconciled loan counters on {drifted} accounts.'))
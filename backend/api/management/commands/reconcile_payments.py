@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.reconciliation import RECONCILE_BATCH_SIZE, reconcile_payments
+
+
+class Command(BaseCommand):
+    help = 'Allocate unreconciled payments to their loans\' open repayment installments, oldest first'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only reconcile payments created from this date (YYYY-MM-DD). Reconciles everything when omitted.'
+        )
+        parser.add_argument('--batch-size', type=int, default=RECONCILE_BATCH_SIZE, help='Loans per batch')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        totals = reconcile_payments(since=since, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {totals.get('payments', 0)} payments on {totals.get('loans', 0)} loans: "
+            f"{totals.get('allocations', 0)} allocations, {totals.get('settled_installments', 0)} installments settled."
+        ))
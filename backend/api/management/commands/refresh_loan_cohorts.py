@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.cohorts import refresh_cohorts
+
+
+class Command(BaseCommand):
+    help = 'Refresh the origination cohort (vintage) table, rebuilding only cohorts with activity since the last refresh'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every cohort')
+
+    def handle(self, *args, **options):
+        cohorts = refresh_cohorts(full=options['full'])
+        if cohorts:
+            months = ', '.join(cohort.strftime('%Y-%m') for cohort in cohorts)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(cohorts)} cohorts: {months}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No cohort changed since the last refresh.'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.models.Loan import Loan
+from api.utils.amortization import SCHEDULE_CHUNK_SIZE, materialize_schedules
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the pending repayment schedules of the loan book'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--status',
+            nargs='+',
+            default=['DISBURSED', 'ACTIVE'],
+            help='Loan statuses to schedule (default: DISBURSED ACTIVE)'
+        )
+        parser.add_argument('--loan', type=int, nargs='+', help='Only these loan ids')
+        parser.add_argument('--chunk-size', type=int, default=SCHEDULE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        loans = Loan.objects.filter(status__in=options['status']).order_by('pk')
+        if options['loan']:
+            loans = loans.filter(pk__in=options['loan'])
+
+        scheduled, created = materialize_schedules(loans, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Scheduled {scheduled} loans with {created} repayments; loans with paid installments were left as they are.'
+        ))
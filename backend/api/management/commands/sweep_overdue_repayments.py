@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.overdue_sweep import SWEEP_BATCH_SIZE, sweep_overdue
+
+
+class Command(BaseCommand):
+    help = (
+        'Nightly sweep: mark overdue installments MISSED, charge late penalties and send payment due reminders. '
+        'Safe to rerun for the same date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Date to sweep for (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE, help='Installments per transaction')
+
+    def handle(self, *args, **options):
+        run_date = None
+        if options['date']:
+            try:
+                run_date = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be a date in YYYY-MM-DD format')
+
+        totals = sweep_overdue(run_date=run_date, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {totals['missed']} installments missed, charged {totals['penalties']} penalties, "
+            f"sent {totals['reminders']} reminders."
+        ))
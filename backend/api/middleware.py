@@ -0,0 +1,149 @@
+"""
+Per-request database instrumentation
+
+QueryMetricsMiddleware records how many queries a request ran, how long
+they took and which statements were repeated (the usual N+1 signature).
+The figures are returned in a Server-Timing header, kept in a small
+in-process history for the debug endpoint, and checked against the
+query_budgets a viewset declares, e.g.
+
+    class LoanViewSet(viewsets.ModelViewSet):
+        query_budgets = {'list': 2, 'retrieve': 2}
+
+Budgets cover the view's own queries: the session and user lookups of
+authentication are resolved before the view runs and left out. Queries
+run while a streaming response is consumed are counted too; those
+requests are recorded and checked once the body has been sent, and get no
+Server-Timing header since it goes out before the body.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_history = deque(maxlen=getattr(settings, 'QUERY_METRICS_HISTORY', 100))
+_history_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def recent_query_metrics():
+    """Return the metrics of the most recent requests, newest first"""
+    with _history_lock:
+        return list(reversed(_history))
+
+
+class _QueryRecorder:
+    """connection.execute_wrapper callable that times every statement"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        return [
+            {
+                'signature': hashlib.sha1(sql.encode()).hexdigest()[:12],
+                'count': count,
+                'sql': sql[:300],
+            }
+            for sql, count in self.statements.most_common()
+            if count > 1
+        ]
+
+
+class QueryMetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = _QueryRecorder()
+        request._query_recorder = recorder
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._record_stream(request, response, recorder, response.streaming_content)
+            return response
+
+        duplicates = recorder.duplicates()
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+            f'dupq;desc="{sum(d["count"] - 1 for d in duplicates)} repeated"'
+        )
+        self._record(request, response, recorder, duplicates)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None:
+            return None
+
+        # DRF viewsets expose the HTTP method -> action mapping on the view function
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        request._query_view = f'{view_class.__name__}.{action}' if action else view_class.__name__
+        request._query_budget = getattr(view_class, 'query_budgets', {}).get(action)
+
+        # Resolve the session user now, so DRF's SessionAuthentication reuses
+        # it and the budget only sees the view's queries
+        user = getattr(request, 'user', None)
+        if user is not None:
+            user.is_authenticated
+        request._query_baseline = request._query_recorder.count
+        return None
+
+    def _record_stream(self, request, response, recorder, content):
+        iterator = iter(content)
+        while True:
+            with connection.execute_wrapper(recorder):
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+            yield chunk
+        self._record(request, response, recorder, recorder.duplicates())
+
+    def _record(self, request, response, recorder, duplicates):
+        view_name = getattr(request, '_query_view', None)
+        budget = getattr(request, '_query_budget', None)
+        view_count = recorder.count - getattr(request, '_query_baseline', 0)
+        with _history_lock:
+            _history.append({
+                'method': request.method,
+                'path': request.path,
+                'view': view_name,
+                'status': response.status_code,
+                'query_count': recorder.count,
+                'view_query_count': view_count,
+                'db_time_ms': round(recorder.duration * 1000, 2),
+                'budget': budget,
+                'duplicates': duplicates,
+                'at': timezone.now().isoformat(),
+            })
+
+        if budget is not None and view_count > budget:
+            message = f'{view_name} ran {view_count} queries, budget is {budget}'
+            if getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['created_at'], name='loans_created_99e948_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', 'updated_at'], name='loans_status_38a735_idx'),
+        ),
+    ]
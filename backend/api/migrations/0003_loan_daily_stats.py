@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:10
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_loan_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Local date the loans were created')),
+                ('status', models.CharField(max_length=50)),
+                ('loan_type', models.CharField(max_length=100)),
+                ('loan_count', models.BigIntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('remaining_balance_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Loan Daily Stats',
+                'verbose_name_plural': 'Loan Daily Stats',
+                'db_table': 'loan_daily_stats',
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['status', 'day'], name='loan_daily__status_adb095_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'loan_type'), name='loan_daily_stats_unique_bucket')],
+            },
+        ),
+    ]
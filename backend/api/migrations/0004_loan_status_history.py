@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_status_history(apps, schema_editor):
+    """
+    Seed history for existing loans: creation at created_at and, when the
+    loan has moved on, its current status at updated_at (best available guess)
+    """
+    Loan = apps.get_model('api', 'Loan')
+    LoanStatusHistory = apps.get_model('api', 'LoanStatusHistory')
+
+    batch = []
+    for loan_id, status, created_at, updated_at in Loan.objects.values_list(
+        'id', 'status', 'created_at', 'updated_at'
+    ).iterator(chunk_size=2000):
+        batch.append(LoanStatusHistory(loan_id=loan_id, from_status=None, to_status='PENDING', changed_at=created_at))
+        if status != 'PENDING':
+            batch.append(LoanStatusHistory(loan_id=loan_id, from_status='PENDING', to_status=status, changed_at=updated_at))
+        if len(batch) >= 2000:
+            LoanStatusHistory.objects.bulk_create(batch)
+            batch = []
+    LoanStatusHistory.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_loan_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=50, null=True)),
+                ('to_status', models.CharField(max_length=50)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='api.loan')),
+            ],
+            options={
+                'verbose_name': 'Loan Status History',
+                'verbose_name_plural': 'Loan Status History',
+                'db_table': 'loan_status_history',
+                'ordering': ['changed_at'],
+                'indexes': [models.Index(fields=['to_status', 'changed_at'], name='loan_status_to_stat_b5953d_idx'), models.Index(fields=['loan', 'changed_at'], name='loan_status_loan_id_42aba4_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_status_history, migrations.RunPython.noop),
+    ]
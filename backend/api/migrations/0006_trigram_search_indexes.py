@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:14
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # auth_user belongs to django.contrib.auth, so its search indexes are raw SQL
+        migrations.RunSQL(
+            sql=[
+                'CREATE INDEX IF NOT EXISTS auth_user_username_trgm ON auth_user USING gin (LOWER(username) gin_trgm_ops);',
+                'CREATE INDEX IF NOT EXISTS auth_user_email_trgm ON auth_user USING gin (LOWER(email) gin_trgm_ops);',
+            ],
+            reverse_sql=[
+                'DROP INDEX IF EXISTS auth_user_username_trgm;',
+                'DROP INDEX IF EXISTS auth_user_email_trgm;',
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('account_number'), name='gin_trgm_ops'), name='accounts_number_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('first_name'), name='gin_trgm_ops'), name='customers_first_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('last_name'), name='gin_trgm_ops'), name='customers_last_name_trgm'),
+        ),
+    ]
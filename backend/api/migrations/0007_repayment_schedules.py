@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='interest_method',
+            field=models.CharField(choices=[('FLAT', 'Flat'), ('REDUCING_BALANCE', 'Reducing Balance')], default='FLAT', help_text='How the repayment schedule charges interest', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='repayment',
+            name='installment_number',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repayment',
+            name='interest_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='repayment',
+            name='principal_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_repayment_schedules'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['transaction_reference'], name='payments_transac_4c44f7_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:22
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_payment_transaction_reference_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('allocated_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Payment Allocation',
+                'verbose_name_plural': 'Payment Allocations',
+                'db_table': 'payment_allocations',
+                'ordering': ['allocated_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='reconciled_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('reconciled_at__isnull', True), ('status', 'COMPLETED')), fields=['loan'], name='payments_unreconciled_idx'),
+        ),
+        migrations.AddField(
+            model_name='paymentallocation',
+            name='payment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='api.payment'),
+        ),
+        migrations.AddField(
+            model_name='paymentallocation',
+            name='repayment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='api.repayment'),
+        ),
+    ]
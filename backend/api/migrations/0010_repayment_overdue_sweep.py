@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_payment_reconciliation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repayment',
+            name='reminder_sent_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='repayment',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['due_date'], name='repayments_pending_due_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_repayment_overdue_sweep'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='repayment',
+            name='repayments_pending_due_idx',
+        ),
+        migrations.AddIndex(
+            model_name='repayment',
+            index=models.Index(condition=models.Q(('status__in', ['PENDING', 'MISSED'])), fields=['due_date'], name='repayments_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repayment',
+            index=models.Index(fields=['loan', 'due_date'], name='repayments_loan_due_idx'),
+        ),
+    ]
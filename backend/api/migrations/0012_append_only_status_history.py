@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_repayment_open_indexes'),
+    ]
+
+    operations = [
+        # Give loans created before the history existed a starting row, so the
+        # latest row at or before a timestamp is always the status at that time
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO loan_status_history (loan_id, from_status, to_status, changed_at)
+                SELECT loan.id, NULL, COALESCE(first_change.from_status, loan.status), loan.created_at
+                FROM loans AS loan
+                LEFT JOIN LATERAL (
+                    SELECT history.from_status FROM loan_status_history AS history
+                    WHERE history.loan_id = loan.id
+                    ORDER BY history.changed_at, history.id
+                    LIMIT 1
+                ) AS first_change ON TRUE
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM loan_status_history AS history
+                    WHERE history.loan_id = loan.id AND history.from_status IS NULL
+                );
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        # Rows may be inserted, or removed together with their loan, but never rewritten
+        migrations.RunSQL(
+            sql=[
+                """
+                CREATE OR REPLACE FUNCTION loan_status_history_append_only() RETURNS trigger AS $$
+                BEGIN
+                    RAISE EXCEPTION 'loan_status_history is append-only';
+                END;
+                $$ LANGUAGE plpgsql;
+                """,
+                """
+                CREATE TRIGGER loan_status_history_no_update
+                BEFORE UPDATE ON loan_status_history
+                FOR EACH ROW EXECUTE FUNCTION loan_status_history_append_only();
+                """,
+            ],
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS loan_status_history_no_update ON loan_status_history;',
+                'DROP FUNCTION IF EXISTS loan_status_history_append_only();',
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:28
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_append_only_status_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='accrued_interest',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Interest recognised to date by the daily accrual', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='interest_accrued_through',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('LOAN_REQUEST', 'Loan Request Submitted'), ('LOAN_APPROVED', 'Loan Request Approved'), ('LOAN_REJECTED', 'Loan Request Rejected'), ('LOAN_DISBURSED', 'Loan Disbursed'), ('REPAYMENT', 'Loan Repayment'), ('REFUND', 'Loan Refund'), ('PENALTY', 'Late Payment Penalty'), ('INTEREST_ACCRUAL', 'Interest Accrual')], max_length=50),
+        ),
+    ]
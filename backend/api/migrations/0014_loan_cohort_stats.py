@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:30
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_interest_accrual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanCohortStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cohort_month', models.DateField(help_text='First day of the month the loans started')),
+                ('months_on_book', models.PositiveIntegerField()),
+                ('loan_count', models.BigIntegerField(default=0)),
+                ('principal_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('repaid_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('defaulted_count', models.BigIntegerField(default=0)),
+                ('defaulted_principal', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Loan Cohort Stats',
+                'verbose_name_plural': 'Loan Cohort Stats',
+                'db_table': 'loan_cohort_stats',
+                'ordering': ['cohort_month', 'months_on_book'],
+                'constraints': [models.UniqueConstraint(fields=('cohort_month', 'months_on_book'), name='loan_cohort_stats_unique_cell')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_loan_cohort_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_transac_4c44f7_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('transaction_reference__isnull', False)), fields=('transaction_reference',), name='payments_transaction_reference_unique'),
+        ),
+    ]
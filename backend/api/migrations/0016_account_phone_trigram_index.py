@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:44
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_payment_transaction_reference_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('phone_number'), name='gin_trgm_ops'), name='accounts_phone_trgm'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:45
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_account_phone_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='account',
+            name='loan_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16),
+        ),
+    ]
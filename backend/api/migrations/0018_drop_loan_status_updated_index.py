@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_widen_account_loan_amount'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='loan',
+            name='loans_status_38a735_idx',
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower
 from decimal import Decimal
 
 class Account(models.Model):
@@ -33,7 +35,7 @@ class Account(models.Model):
         ('AGENT', 'Agent'),
     ])
     referal_citizen= models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True) #can be null if is a foreigner he should have a citizen id 
-    loan_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    loan_amount = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
     total_loans = models.BigIntegerField(default=0)
     account_number = models.CharField(max_length=20, unique=True)
     last_login = models.DateTimeField(null=True, blank=True)
@@ -55,3 +57,8 @@ class Account(models.Model):
         verbose_name = 'Account'
         verbose_name_plural = 'Accounts'
         db_table = 'accounts'
+        indexes = [
+            # Serve api.utils.search.trigram_search; exact lookups use the unique index
+            GinIndex(OpClass(Lower('account_number'), name='gin_trgm_ops'), name='accounts_number_trgm'),
+            GinIndex(OpClass(Lower('phone_number'), name='gin_trgm_ops'), name='accounts_phone_trgm'),
+        ]
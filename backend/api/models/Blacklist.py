@@ -303,6 +303,7 @@ class AuditLog(models.Model):
             models.Index(fields=['user', 'created_at']),
             models.Index(fields=['action_type', 'created_at']),
             models.Index(fields=['affected_model', 'affected_object_id']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class Customer(models.Model):
@@ -71,4 +73,7 @@ class Customer(models.Model):
         indexes = [
             models.Index(fields=['sa_id_number', 'is_blacklisted']),
             models.Index(fields=['is_blacklisted', 'created_at']),
+            # Serve api.utils.search.trigram_search
+            GinIndex(OpClass(Lower('first_name'), name='gin_trgm_ops'), name='customers_first_name_trgm'),
+            GinIndex(OpClass(Lower('last_name'), name='gin_trgm_ops'), name='customers_last_name_trgm'),
         ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from decimal import Decimal
 
 class Loan(models.Model):
@@ -19,6 +19,15 @@ class Loan(models.Model):
     billing_address = models.TextField(null=True, blank=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     interest_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    interest_method = models.CharField(
+        max_length=20,
+        default='FLAT',
+        choices=[
+            ('FLAT', 'Flat'),
+            ('REDUCING_BALANCE', 'Reducing Balance'),
+        ],
+        help_text="How the repayment schedule charges interest"
+    )
     
     period_months = models.IntegerField(default=12, help_text="Loan period in months")
     monthly_payment = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
@@ -27,6 +36,8 @@ class Loan(models.Model):
     repayment_progress = models.IntegerField(default=0, help_text="Repayment progress percentage")
     next_payment_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     next_payment_date = models.DateField(null=True, blank=True)
+    accrued_interest = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text="Interest recognised to date by the daily accrual")
+    interest_accrued_through = models.DateField(null=True, blank=True)
     agreement_date = models.DateField(null=True, blank=True)
 
     status = models.CharField(
@@ -50,14 +61,57 @@ class Loan(models.Model):
 
     def __str__(self):
         return f"Loan {self.pk} for {self.borrower}"
-        
+
+    def _tracked_values(self):
+        from ..utils.loan_stats import TRACKED_FIELDS
+        return {field: getattr(self, field) for field in TRACKED_FIELDS}
+
+    def _stored_tracked_values(self):
+        """
+        Lock the stored row and return what the daily rollup and the
+        borrower's loan counters currently hold for it
+
+        Read under the lock rather than remembered from load time, so a
+        set-based UPDATE (post_payment, transition_loans) committed in
+        between is not counted twice. Deletions go through the pre_delete
+        receiver in api.signals.
+        """
+        from ..utils.loan_stats import TRACKED_FIELDS
+        if self.pk is None:
+            return None
+        return Loan.objects.select_for_update().filter(pk=self.pk).values(*TRACKED_FIELDS).first()
+
+    def save(self, *args, **kwargs):
+        from ..utils.customer_counters import record_customer_loan_change
+        from ..utils.dashboard_cache import schedule_dashboard_refresh
+        from ..utils.loan_stats import record_loan_change
+        from .LoanStatusHistory import LoanStatusHistory
+        with transaction.atomic():
+            previous = self._stored_tracked_values() if not self._state.adding else None
+            super().save(*args, **kwargs)
+            current = self._tracked_values()
+            update_fields = kwargs.get('update_fields')
+            if previous and update_fields is not None:
+                # Fields left out of the write keep their stored values
+                written = {self._meta.get_field(name).attname for name in update_fields}
+                current = {field: current[field] if field in written else previous[field] for field in current}
+            record_loan_change(previous, current)
+            record_customer_loan_change(previous, current)
+            from_status = previous['status'] if previous else None
+            if from_status != current['status']:
+                LoanStatusHistory.objects.create(loan=self, from_status=from_status, to_status=current['status'])
+            schedule_dashboard_refresh()
+
     def calculate_loan_details(self):
         """Calculate monthly payment, total amount, and other loan details"""
         if self.amount and self.interest_rate and self.period_months:
-            # Simple interest calculation
-            total_interest = (self.amount * self.interest_rate * self.period_months) / (100 * 12)
-            self.total_amount = self.amount + total_interest
-            self.monthly_payment = self.total_amount / self.period_months
+            from ..utils.amortization import amortize
+            principal, interest = amortize(
+                [int(self.amount * 100)], [float(self.interest_rate)], [self.period_months], [self.interest_method]
+            )
+            installments = (principal + interest)[0]
+            self.total_amount = Decimal(int(installments.sum())).scaleb(-2)
+            self.monthly_payment = Decimal(int(installments[0])).scaleb(-2)
             if not self.remaining_balance:
                 self.remaining_balance = self.total_amount
             self.save()
@@ -66,3 +120,6 @@ class Loan(models.Model):
         db_table = 'loans'
         verbose_name = 'Loan'
         verbose_name_plural = 'Loans'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
@@ -0,0 +1,33 @@
+from django.db import models
+from decimal import Decimal
+
+
+class LoanCohortStats(models.Model):
+    """
+    Vintage curves per origination month.
+    One row per cohort (month the loans started) and month on book, with
+    cumulative repaid and defaulted figures up to and including that month.
+    Rebuilt cohort by cohort by refresh_loan_cohorts.
+    """
+    cohort_month = models.DateField(help_text="First day of the month the loans started")
+    months_on_book = models.PositiveIntegerField()
+
+    loan_count = models.BigIntegerField(default=0)
+    principal_total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    repaid_total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    defaulted_count = models.BigIntegerField(default=0)
+    defaulted_principal = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.cohort_month:%Y-%m} MOB {self.months_on_book}"
+
+    class Meta:
+        db_table = 'loan_cohort_stats'
+        verbose_name = 'Loan Cohort Stats'
+        verbose_name_plural = 'Loan Cohort Stats'
+        ordering = ['cohort_month', 'months_on_book']
+        constraints = [
+            models.UniqueConstraint(fields=['cohort_month', 'months_on_book'], name='loan_cohort_stats_unique_cell'),
+        ]
@@ -0,0 +1,34 @@
+from django.db import models
+from decimal import Decimal
+
+
+class LoanDailyStats(models.Model):
+    """
+    Rollup of the loan book per origination day, status and loan type.
+    Kept current incrementally on every loan write so dashboard charts
+    read O(days) rows instead of scanning the loans table.
+    """
+    day = models.DateField(help_text="Local date the loans were created")
+    status = models.CharField(max_length=50)
+    loan_type = models.CharField(max_length=100)
+
+    loan_count = models.BigIntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    remaining_balance_total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.day} {self.status} {self.loan_type}: {self.loan_count}"
+
+    class Meta:
+        db_table = 'loan_daily_stats'
+        verbose_name = 'Loan Daily Stats'
+        verbose_name_plural = 'Loan Daily Stats'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status', 'loan_type'], name='loan_daily_stats_unique_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'day']),
+        ]
@@ -0,0 +1,47 @@
+from django.db import NotSupportedError, models
+from django.utils import timezone
+
+
+class LoanStatusHistoryQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise NotSupportedError('Loan status history is append-only')
+
+    def delete(self):
+        raise NotSupportedError('Loan status history is append-only')
+
+
+class LoanStatusHistory(models.Model):
+    """
+    Append-only record of every loan status transition.
+    Rows are only ever inserted, so counts over closed time windows never change.
+    Every loan starts with a row whose from_status is null, so the latest row
+    at or before a timestamp is the loan's status at that time.
+    """
+    loan = models.ForeignKey('Loan', on_delete=models.CASCADE, related_name='status_history')
+    from_status = models.CharField(max_length=50, null=True, blank=True)
+    to_status = models.CharField(max_length=50)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    objects = LoanStatusHistoryQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Loan {self.loan_id}: {self.from_status} -> {self.to_status} at {self.changed_at}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise NotSupportedError('Loan status history is append-only')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        # Rows only go away with their loan (ON DELETE CASCADE)
+        raise NotSupportedError('Loan status history is append-only')
+
+    class Meta:
+        db_table = 'loan_status_history'
+        verbose_name = 'Loan Status History'
+        verbose_name_plural = 'Loan Status History'
+        ordering = ['changed_at']
+        indexes = [
+            models.Index(fields=['to_status', 'changed_at']),
+            models.Index(fields=['loan', 'changed_at']),
+        ]
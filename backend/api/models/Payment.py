@@ -32,14 +32,45 @@ class Payment(models.Model):
 
     payment_date = models.DateField(null=True, blank=True)
     processed_at = models.DateTimeField(null=True, blank=True)
+
+    # reconciled_amount is what the reconciliation job has allocated to
+    # installments so far; reconciled_at is set once all of it is allocated
+    reconciled_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    reconciled_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Payment {self.pk} - R {self.amount} for Loan {self.loan.pk}"
+
+    def save(self, *args, **kwargs):
+        from ..utils.dashboard_cache import schedule_dashboard_refresh
+        super().save(*args, **kwargs)
+        schedule_dashboard_refresh()
+
+    def delete(self, *args, **kwargs):
+        from ..utils.dashboard_cache import schedule_dashboard_refresh
+        schedule_dashboard_refresh()
+        return super().delete(*args, **kwargs)
     
     class Meta:
         db_table = 'payments'
         verbose_name = 'Payment'
         verbose_name_plural = 'Payments'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(
+                fields=['loan'],
+                condition=models.Q(status='COMPLETED', reconciled_at__isnull=True),
+                name='payments_unreconciled_idx'
+            ),
+        ]
+        constraints = [
+            # A bank transaction can only ever be posted once
+            models.UniqueConstraint(
+                fields=['transaction_reference'],
+                condition=models.Q(transaction_reference__isnull=False),
+                name='payments_transaction_reference_unique'
+            ),
+        ]
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class PaymentAllocation(models.Model):
+    """
+    Part of a payment applied to one repayment installment.
+    Written by the reconciliation job (api.utils.reconciliation).
+    """
+    payment = models.ForeignKey('Payment', on_delete=models.CASCADE, related_name='allocations')
+    repayment = models.ForeignKey('Repayment', on_delete=models.CASCADE, related_name='allocations')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    allocated_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Payment {self.payment_id} -> Repayment {self.repayment_id}: R {self.amount}"
+
+    class Meta:
+        db_table = 'payment_allocations'
+        verbose_name = 'Payment Allocation'
+        verbose_name_plural = 'Payment Allocations'
+        ordering = ['allocated_at']
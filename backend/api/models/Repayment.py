@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 
 class Repayment(models.Model):
     """
@@ -10,17 +11,23 @@ class Repayment(models.Model):
         ('LATE', 'Paid Late'),
         ('MISSED', 'Missed'),
     ]
+    # Installments that still have an amount due
+    OPEN_STATUSES = ('PENDING', 'MISSED')
     
     loan = models.ForeignKey('Loan', on_delete=models.CASCADE, related_name='repayments')
     
+    installment_number = models.PositiveIntegerField(null=True, blank=True)
     due_date = models.DateField()
     amount_due = models.DecimalField(max_digits=10, decimal_places=2)
+    principal_due = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    interest_due = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     
     status = models.CharField(max_length=20, choices=REPAYMENT_STATUS, default='PENDING')
     
     payment_date = models.DateField(null=True, blank=True)
     payment_method = models.CharField(max_length=50, blank=True, null=True)
+    reminder_sent_on = models.DateField(null=True, blank=True)
     
     notes = models.TextField(blank=True)
     
@@ -29,9 +36,37 @@ class Repayment(models.Model):
     
     def __str__(self):
         return f"Repayment for Loan #{self.loan.id} - Due: {self.due_date}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_due_date = dict(zip(field_names, values)).get('due_date')
+        return instance
+
+    def save(self, *args, **kwargs):
+        from ..utils.dashboard_cache import schedule_dashboard_refresh
+        from ..utils.dashboard_metrics import invalidate_repayment_month
+        super().save(*args, **kwargs)
+        schedule_dashboard_refresh()
+        # Cached dashboard months are keyed on due month; drop both the old and new one
+        invalidate_repayment_month(getattr(self, '_loaded_due_date', None))
+        invalidate_repayment_month(self.due_date)
+        self._loaded_due_date = self.due_date
+
+    def delete(self, *args, **kwargs):
+        from ..utils.dashboard_cache import schedule_dashboard_refresh
+        from ..utils.dashboard_metrics import invalidate_repayment_month
+        invalidate_repayment_month(self.due_date)
+        schedule_dashboard_refresh()
+        return super().delete(*args, **kwargs)
     
     class Meta:
         db_table = 'repayments'
         verbose_name = 'Repayment'
         verbose_name_plural = 'Repayments'
         ordering = ['due_date']
+        indexes = [
+            # Overdue, upcoming and the nightly sweep only ever scan open installments
+            models.Index(fields=['due_date'], condition=Q(status__in=['PENDING', 'MISSED']), name='repayments_open_due_idx'),
+            models.Index(fields=['loan', 'due_date'], name='repayments_loan_due_idx'),
+        ]
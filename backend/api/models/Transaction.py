@@ -12,6 +12,7 @@ class Transaction(models.Model):
         ('REPAYMENT', 'Loan Repayment'),
         ('REFUND', 'Loan Refund'),
         ('PENALTY', 'Late Payment Penalty'),
+        ('INTEREST_ACCRUAL', 'Interest Accrual'),
     ]
     
     loan = models.ForeignKey('Loan', on_delete=models.CASCADE, related_name='transactions')
@@ -36,3 +37,6 @@ class Transaction(models.Model):
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
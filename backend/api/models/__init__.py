@@ -1,11 +1,15 @@
 from .Account import Account
 from .Customer import Customer
 from .Loan import Loan
+from .LoanDailyStats import LoanDailyStats
+from .LoanCohortStats import LoanCohortStats
+from .LoanStatusHistory import LoanStatusHistory
 from .Appointment import Appointment
 from .Transaction import Transaction
 from .Repayment import Repayment
 from .PaymentMethod import PaymentMethod
 from .Payment import Payment
+from .PaymentAllocation import PaymentAllocation
 from .Notification import Notification
 from .NotificationPreference import NotificationPreference
 from .UserSession import UserSession
@@ -16,11 +20,15 @@ __all__ = [
     'Account', 
     'Customer', 
     'Loan', 
+    'LoanDailyStats',
+    'LoanCohortStats',
+    'LoanStatusHistory',
     'Appointment', 
     'Transaction', 
     'Repayment',
     'PaymentMethod',
     'Payment',
+    'PaymentAllocation',
     'Notification',
     'NotificationPreference',
     'UserSession',
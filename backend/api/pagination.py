@@ -0,0 +1,66 @@
+"""
+Opt-in keyset pagination for high-volume list endpoints
+
+Viewsets that set pagination_class = KeysetPagination keep the default
+page-number behaviour, and additionally serve ?pagination=cursor and
+?cursor=<token> by seeking on (created_at, id) instead of counting the
+table and scanning an OFFSET. Cursor pages cost the same at any depth.
+"""
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.utils.keyset import InvalidCursor, before, decode_cursor, encode_cursor
+
+
+class KeysetPagination(PageNumberPagination):
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        # Newest first; id breaks ties between rows created in the same instant
+        queryset = queryset.order_by('-created_at', '-id')
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            try:
+                queryset = queryset.filter(before(decode_cursor(token)))
+            except InvalidCursor:
+                raise NotFound('Invalid cursor')
+
+        # One extra row tells us whether another page exists without a COUNT
+        items = list(queryset[:page_size + 1])
+        self.has_next = len(items) > page_size
+        self.page_items = items[:page_size]
+        return self.page_items
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page_items[-1]
+        if isinstance(last, dict):
+            token = encode_cursor(last['created_at'], last['id'])
+        else:
+            token = encode_cursor(last.created_at, last.pk)
+        url = remove_query_param(self.request.build_absolute_uri(), self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
@@ -0,0 +1,30 @@
+"""
+Opt-in trigram search for the API and the admin
+
+Viewsets that list TrigramSearchFilter in filter_backends, and admins that
+mix in TrigramSearchAdminMixin, run ?search= / the admin search box through
+api.utils.search.trigram_search using their own search_fields.
+"""
+from rest_framework.filters import SearchFilter
+
+from api.utils.search import trigram_search
+
+
+class TrigramSearchFilter(SearchFilter):
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        term = request.query_params.get(self.search_param, '')
+        if not search_fields or not term.strip():
+            return queryset
+        return trigram_search(queryset, term, search_fields)
+
+
+class TrigramSearchAdminMixin:
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term.strip():
+            return queryset, False
+        # Related columns are matched in pk__in subqueries, so rows never repeat
+        return trigram_search(queryset, search_term, search_fields), False
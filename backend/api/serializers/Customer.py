@@ -54,12 +54,11 @@ class CustomerSerializer(serializers.ModelSerializer):
         return None
     
     def get_total_loans(self, obj):
-        return obj.loan_set.count()
+        # Counters are kept current by Loan.save()/delete()
+        return obj.account.total_loans if hasattr(obj, 'account') else 0
     
     def get_total_loan_amount(self, obj):
-        from django.db.models import Sum
-        total = obj.loan_set.aggregate(total=Sum('amount'))['total']
-        return str(total) if total else "0.00"
+        return str(obj.account.loan_amount) if hasattr(obj, 'account') else "0.00"
     
     def get_account_status(self, obj):
         return obj.account.status if hasattr(obj, 'account') else None
@@ -1,3 +1,4 @@
+from datetime import date
 from rest_framework import serializers
 from ..models.Loan import Loan
 from ..models.Customer import Customer
@@ -25,6 +26,7 @@ class LoanSerializer(serializers.ModelSerializer):
             'amount',
             'formatted_amount',
             'interest_rate',
+            'interest_method',
             'period_months',
             'monthly_payment',
             'formatted_monthly_payment',
@@ -59,7 +61,6 @@ class LoanSerializer(serializers.ModelSerializer):
         return None
     
     def get_days_until_due(self, obj):
-        from datetime import date
         if obj.end_date:
             delta = obj.end_date - date.today()
             return delta.days
@@ -80,13 +81,99 @@ class LoanSerializer(serializers.ModelSerializer):
     def get_formatted_total_amount(self, obj):
         return f"R {obj.total_amount:,.2f}"
 
+
+# Columns read by serialize_loan_rows; everything LoanSerializer renders,
+# including the borrower name and email it otherwise reaches through relations
+LOAN_LIST_COLUMNS = (
+    'id', 'borrower_id', 'borrower__first_name', 'borrower__last_name',
+    'borrower__account__user__email', 'loan_type', 'amount', 'interest_rate',
+    'interest_method', 'period_months', 'monthly_payment', 'total_amount', 'remaining_balance',
+    'repayment_progress', 'next_payment_amount', 'next_payment_date',
+    'agreement_date', 'status', 'start_date', 'end_date', 'purpose_description',
+    'billing_address', 'repayment_methods', 'created_at', 'updated_at',
+)
+
+
+def loan_list_rows(queryset):
+    """Narrow a Loan queryset to the single joined query serialize_loan_rows needs"""
+    return queryset.values(*LOAN_LIST_COLUMNS)
+
+
+def serialize_loan_rows(rows):
+    """
+    Render loan_list_rows() output exactly as LoanSerializer(many=True) would
+
+    Builds plain dicts in one pass instead of running nine method fields and
+    the relation lookups per loan. Typed columns reuse LoanSerializer's own
+    field instances, so decimals and datetimes are rendered identically.
+
+    Args:
+        rows: Iterable of dictionaries from loan_list_rows()
+
+    Returns:
+        List of dictionaries in LoanSerializer field order
+    """
+    fields = LoanSerializer().fields
+    render_decimal = fields['amount'].to_representation
+    render_rate = fields['interest_rate'].to_representation
+    render_date = fields['start_date'].to_representation
+    render_datetime = fields['created_at'].to_representation
+    today = date.today()
+
+    data = []
+    for row in rows:
+        amount = row['amount']
+        monthly_payment = row['monthly_payment']
+        total_amount = row['total_amount']
+        remaining_balance = row['remaining_balance']
+        next_payment_amount = row['next_payment_amount']
+        next_payment_date = row['next_payment_date']
+        agreement_date = row['agreement_date']
+        end_date = row['end_date']
+        data.append({
+            'id': row['id'],
+            'borrower': row['borrower_id'],
+            'borrower_name': f"{row['borrower__first_name']} {row['borrower__last_name']}",
+            'borrower_email': row['borrower__account__user__email'],
+            'borrower_phone': None,
+            'loan_type': row['loan_type'],
+            'amount': render_decimal(amount),
+            'formatted_amount': f"R {amount:,.2f}",
+            'interest_rate': render_rate(row['interest_rate']),
+            'interest_method': row['interest_method'],
+            'period_months': row['period_months'],
+            'monthly_payment': render_decimal(monthly_payment),
+            'formatted_monthly_payment': f"R {monthly_payment:,.2f}",
+            'total_amount': render_decimal(total_amount),
+            'formatted_total_amount': f"R {total_amount:,.2f}",
+            'remaining_balance': render_decimal(remaining_balance),
+            'formatted_remaining_balance': f"R {remaining_balance:,.2f}",
+            'repayment_progress': row['repayment_progress'],
+            'next_payment_amount': render_decimal(next_payment_amount),
+            'formatted_next_payment': f"R {next_payment_amount:,.2f}",
+            'next_payment_date': render_date(next_payment_date) if next_payment_date is not None else None,
+            'agreement_date': render_date(agreement_date) if agreement_date is not None else None,
+            'status': row['status'],
+            'start_date': render_date(row['start_date']),
+            'end_date': render_date(end_date),
+            'days_until_due': (end_date - today).days if end_date else None,
+            'purpose_description': row['purpose_description'],
+            'billing_address': row['billing_address'],
+            'repayment_methods': row['repayment_methods'],
+            'created_at': render_datetime(row['created_at']),
+            'updated_at': render_datetime(row['updated_at']),
+        })
+    return data
+
+
 class LoanDetailSerializer(LoanSerializer):
     payments_history = serializers.SerializerMethodField()
     
     class Meta(LoanSerializer.Meta):
-        fields = LoanSerializer.Meta.fields + ['payments_history']
+        fields = LoanSerializer.Meta.fields + ['accrued_interest', 'interest_accrued_through', 'payments_history']
+        read_only_fields = LoanSerializer.Meta.read_only_fields + ['accrued_interest', 'interest_accrued_through']
     
     def get_payments_history(self, obj):
         from .Payment import PaymentSerializer
-        payments = obj.payments.all()[:10]  # Last 10 payments
+        payments = obj.payments.select_related('customer', 'loan', 'payment_method')[:10]  # Last 10 payments
         return PaymentSerializer(payments, many=True).data
@@ -12,8 +12,11 @@ class RepaymentSerializer(serializers.ModelSerializer):
             'id',
             'loan',
             'loan_borrower_name',
+            'installment_number',
             'due_date',
             'amount_due',
+            'principal_due',
+            'interest_due',
             'amount_paid',
             'remaining_balance',
             'status',
@@ -31,7 +34,7 @@ class RepaymentSerializer(serializers.ModelSerializer):
     
     def get_is_overdue(self, obj):
         from datetime import date
-        return obj.due_date < date.today() and obj.status == 'PENDING'
+        return obj.due_date < date.today() and obj.status in Repayment.OPEN_STATUSES
     
     def get_remaining_balance(self, obj):
         return obj.amount_due - obj.amount_paid
@@ -0,0 +1,26 @@
+"""
+Model signal receivers
+
+Loan deletions are accounted for here rather than in Loan.delete() so that
+cascades from customers and accounts, queryset deletes and the admin's
+delete_selected all keep the rollups in step too.
+"""
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from api.models.Loan import Loan
+from api.utils.customer_counters import record_customer_loan_change
+from api.utils.dashboard_cache import schedule_dashboard_refresh
+from api.utils.loan_stats import record_loan_change
+
+
+@receiver(pre_delete, sender=Loan)
+def release_deleted_loan(sender, instance, **kwargs):
+    """
+    Take a loan's contribution out of the daily rollup and its borrower's
+    counters, inside the transaction that deletes it
+    """
+    previous = instance._stored_tracked_values()
+    record_loan_change(previous, None)
+    record_customer_loan_change(previous, None)
+    schedule_dashboard_refresh()
@@ -0,0 +1,601 @@
+import io
+import threading
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import count
+
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from api.middleware import recent_query_metrics
+from api.models.Account import Account
+from api.models.Customer import Customer
+from api.models.Loan import Loan
+from api.models.LoanDailyStats import LoanDailyStats
+from api.models.LoanStatusHistory import LoanStatusHistory
+from api.models.Payment import Payment
+from api.models.Repayment import Repayment
+from api.models.Transaction import Transaction
+from api.serializers.Loan import LoanSerializer, loan_list_rows, serialize_loan_rows
+from api.utils.amortization import materialize_schedules
+from api.utils.dashboard_metrics import dashboard_stats, repayment_performance
+from api.utils.idempotency import _release
+from api.utils.interest_accrual import accrue_interest
+from api.utils.loan_transitions import bulk_transition
+from api.utils.loss_simulation import loss_summary, simulate_losses
+from api.utils.overdue_sweep import PENALTY_REFERENCE, sweep_overdue
+from api.utils.payments import post_payment
+from api.utils.reconciliation import reconcile_payments
+from api.utils.statement_ingest import ingest_statement
+
+TEST_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'CHANNEL_LAYERS': {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+}
+
+_sequence = count(1)
+
+
+def create_customer(**fields):
+    number = next(_sequence)
+    user = User.objects.create_user(username=f'borrower{number}', password='secret')
+    account = Account.objects.create(user=user, account_number=f'ACC{number:06d}', phone_number=f'082{number:07d}')
+    return Customer.objects.create(
+        account=account,
+        first_name='Test',
+        last_name=f'Borrower {number}',
+        sa_id_number=f'{number:013d}',
+        country='South Africa',
+        city='Johannesburg',
+        state='Gauteng',
+        postal_code='2000',
+        address='1 Main Road',
+        **fields
+    )
+
+
+def create_loan(borrower=None, status='ACTIVE', amount=Decimal('10000.00'), **fields):
+    return Loan.objects.create(
+        borrower=borrower or create_customer(),
+        amount=amount,
+        interest_rate=fields.pop('interest_rate', Decimal('12.00')),
+        total_amount=fields.pop('total_amount', amount),
+        remaining_balance=fields.pop('remaining_balance', amount),
+        status=status,
+        start_date=fields.pop('start_date', date(2026, 1, 1)),
+        end_date=fields.pop('end_date', date(2027, 1, 1)),
+        **fields
+    )
+
+
+def run_concurrently(target, arguments):
+    """Run target once per argument tuple, each in its own thread and connection, released together"""
+    barrier = threading.Barrier(len(arguments))
+    results = [None] * len(arguments)
+    errors = []
+
+    def worker(position, args):
+        try:
+            barrier.wait()
+            results[position] = target(*args)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(position, args)) for position, args in enumerate(arguments)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+@override_settings(**TEST_SETTINGS)
+class StatementIngestConcurrencyTests(TransactionTestCase):
+
+    def test_overlapping_uploads_post_each_line_once(self):
+        loans = [create_loan() for _ in range(3)]
+        statement = 'reference,amount,date,transaction_id\n' + ''.join(
+            f'LOAN-{loan.pk},1500.00,2026-10-01,FNB-{loan.pk}\n' for loan in loans
+        )
+
+        def upload():
+            return list(ingest_statement(io.BytesIO(statement.encode()), 'csv', chunk_size=2))
+
+        first, second = run_concurrently(upload, [(), ()])
+
+        summaries = [results[-1]['summary'] for results in (first, second)]
+        self.assertEqual(sum(summary['posted'] for summary in summaries), 3)
+        self.assertEqual(sum(summary['duplicate'] for summary in summaries), 3)
+        self.assertEqual(Payment.objects.filter(loan__in=loans).count(), 3)
+        for loan in loans:
+            loan.refresh_from_db()
+            self.assertEqual(loan.remaining_balance, Decimal('8500.00'))
+
+    def test_same_bank_reference_into_different_loans_is_posted_once(self):
+        loans = [create_loan() for _ in range(2)]
+        statements = [
+            f'reference,amount,date,transaction_id\nLOAN-{loan.pk},1500.00,2026-10-01,FNB-778812\n'
+            for loan in loans
+        ]
+
+        def upload(statement):
+            return list(ingest_statement(io.BytesIO(statement.encode()), 'csv'))
+
+        results = run_concurrently(upload, [(statement,) for statement in statements])
+
+        statuses = sorted(lines[0]['status'] for lines in results)
+        self.assertEqual(statuses, ['duplicate', 'posted'])
+        self.assertEqual(Payment.objects.filter(transaction_reference='FNB-778812').count(), 1)
+
+
+@override_settings(**TEST_SETTINGS)
+class StatementIngestTests(TestCase):
+
+    def ingest(self, statement):
+        return list(ingest_statement(io.BytesIO(statement.encode()), 'csv'))
+
+    def test_bare_number_is_an_account_number_not_a_loan_id(self):
+        borrower = create_customer()
+        loan = create_loan(borrower=borrower)
+        other = create_loan()
+        Account.objects.filter(pk=borrower.account_id).update(account_number=str(other.pk))
+
+        results = self.ingest(f'reference,amount,date,transaction_id\n{other.pk},100.00,2026-10-01,FNB-1\n')
+
+        self.assertEqual(results[0]['status'], 'posted')
+        self.assertEqual(results[0]['loan_id'], loan.pk)
+
+    def test_out_of_range_amount_is_rejected_per_line(self):
+        loan = create_loan()
+
+        results = self.ingest(
+            'reference,amount,date,transaction_id\n'
+            f'LOAN-{loan.pk},100000000.00,2026-10-01,FNB-1\n'
+            f'LOAN-{loan.pk},100.00,2026-10-01,FNB-2\n'
+        )
+
+        self.assertEqual([result.get('status') for result in results[:2]], ['invalid', 'posted'])
+        self.assertEqual(results[-1]['summary']['posted'], 1)
+
+
+@override_settings(**TEST_SETTINGS)
+class PaymentPostingConcurrencyTests(TransactionTestCase):
+    threads = 20
+    payments_per_thread = 25
+
+    def test_concurrent_payments_all_apply(self):
+        loan = create_loan(amount=Decimal('10000.00'))
+
+        def pay():
+            for _ in range(self.payments_per_thread):
+                post_payment(loan.pk, Decimal('10.00'))
+
+        run_concurrently(pay, [()] * self.threads)
+
+        posted = self.threads * self.payments_per_thread
+        loan.refresh_from_db()
+        self.assertEqual(Payment.objects.filter(loan=loan).count(), posted)
+        self.assertEqual(loan.remaining_balance, Decimal('10000.00') - posted * Decimal('10.00'))
+        self.assertEqual(loan.repayment_progress, posted // 10)
+        self.assertEqual(loan.status, 'ACTIVE')
+
+
+@override_settings(**TEST_SETTINGS)
+class BulkTransitionTests(TransactionTestCase):
+
+    def assert_disbursed_at_schedule_total(self, loan):
+        scheduled = Repayment.objects.filter(loan=loan).aggregate(total=Sum('amount_due'))['total']
+        loan.refresh_from_db()
+        self.assertEqual(loan.status, 'DISBURSED')
+        self.assertEqual(loan.total_amount, scheduled)
+        self.assertEqual(loan.remaining_balance, scheduled)
+        rollup = LoanDailyStats.objects.filter(status='DISBURSED').aggregate(total=Sum('remaining_balance_total'))
+        self.assertEqual(rollup['total'], scheduled)
+
+    def test_bulk_disbursement_opens_the_balance(self):
+        loan = create_loan(status='APPROVED', total_amount=Decimal('11200.00'), remaining_balance=Decimal('0.00'))
+
+        updated, skipped = bulk_transition([loan.pk], 'DISBURSED')
+
+        self.assertEqual((updated, skipped), ([loan.pk], {}))
+        self.assert_disbursed_at_schedule_total(loan)
+
+    def test_balance_comes_from_the_new_schedule(self):
+        # As created through the API, before any schedule exists
+        loan = create_loan(status='APPROVED', total_amount=Decimal('0.00'), remaining_balance=Decimal('0.00'))
+
+        bulk_transition([loan.pk], 'DISBURSED')
+
+        self.assert_disbursed_at_schedule_total(loan)
+        self.assertEqual(loan.remaining_balance, Decimal('11200.00'))
+
+    def test_reducing_balance_loan_replaces_its_flat_estimate(self):
+        loan = create_loan(
+            status='APPROVED',
+            interest_method='REDUCING_BALANCE',
+            total_amount=Decimal('11200.00'),
+            remaining_balance=Decimal('11200.00'),
+        )
+
+        bulk_transition([loan.pk], 'DISBURSED')
+
+        self.assert_disbursed_at_schedule_total(loan)
+        self.assertLess(loan.remaining_balance, Decimal('11200.00'))
+
+
+@override_settings(**TEST_SETTINGS)
+class QueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        borrower = create_customer()
+        for status in ('PENDING', 'APPROVED', 'DISBURSED', 'ACTIVE', 'CLOSED'):
+            create_loan(borrower=borrower, status=status)
+            create_loan(status=status)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_dashboard_stats(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('dashboard-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_loans_count'], 10)
+
+        # Served from the panel cache until something changes
+        with self.assertNumQueries(0):
+            self.client.get(reverse('dashboard-stats'))
+
+    def test_today_decisions_come_from_status_history(self):
+        approved_yesterday = create_loan(status='PENDING')
+        LoanStatusHistory.objects.create(
+            loan=approved_yesterday, from_status='PENDING', to_status='APPROVED',
+            changed_at=timezone.now() - timedelta(days=1),
+        )
+        # A payment or edit today touches updated_at but is not a decision
+        Loan.objects.filter(pk=approved_yesterday.pk).update(status='APPROVED', updated_at=timezone.now())
+
+        stats = dashboard_stats()
+
+        # Only the two loans setUpTestData created as APPROVED were decided today
+        self.assertEqual(stats['today_approvals'], 2)
+        self.assertEqual(stats['today_declines'], 0)
+
+    def test_loan_list(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('loan-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 10)
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True, **TEST_SETTINGS)
+class QueryBudgetTests(TestCase):
+    """Requests from a logged-in user stay within their viewset's query_budgets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='staff', password='secret', is_staff=True)
+        cls.loan = create_loan()
+        create_loan(status='DISBURSED')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_views_stay_within_budget(self):
+        for url in (
+            reverse('dashboard-stats'),
+            reverse('dashboard-loan-status-breakdown'),
+            reverse('dashboard-portfolio-at-risk'),
+            reverse('dashboard-cohorts'),
+            reverse('loan-list'),
+            reverse('loan-detail', args=[self.loan.pk]),
+            reverse('customer-list'),
+            reverse('repayment-stats'),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_streamed_queries_count_against_the_budget(self):
+        response = self.client.get(reverse('dashboard-portfolio-at-risk-export'))
+        b''.join(response.streaming_content)
+
+        metrics = recent_query_metrics()[0]
+        self.assertEqual(metrics['view'], 'DashboardViewSet.portfolio_at_risk_export')
+        self.assertEqual(metrics['view_query_count'], 1)
+
+    def test_over_budget_report_matches_enforcement(self):
+        self.assertEqual(self.client.get(reverse('loan-list')).status_code, 200)
+        metrics = recent_query_metrics()[0]
+        self.assertGreater(metrics['query_count'], metrics['budget'])
+
+        with self.settings(DEBUG=True):
+            response = self.client.get(reverse('query-metrics-list'), {'over_budget': 'true', 'path': reverse('loan-list')})
+
+        self.assertEqual(response.json(), [])
+
+
+@override_settings(**TEST_SETTINGS)
+class RepaymentMonthCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_closed_month_is_dropped_only_once_the_write_commits(self):
+        loan = create_loan()
+        repayment = Repayment.objects.create(loan=loan, due_date=date(2026, 8, 15), amount_due=Decimal('100.00'))
+        today = date(2026, 10, 17)
+        self.assertEqual(repayment_performance(3, today)[0]['on_time'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            repayment.status = 'ON_TIME'
+            repayment.save()
+            # Still the cached figure while the write is uncommitted
+            self.assertEqual(repayment_performance(3, today)[0]['on_time'], 0)
+
+        self.assertTrue(callbacks)
+        self.assertEqual(repayment_performance(3, today)[0]['on_time'], 1)
+
+
+@override_settings(**TEST_SETTINGS)
+class InterestAccrualTests(TestCase):
+
+    def test_days_accrue_once_in_any_order(self):
+        loan = create_loan(start_date=date(2026, 9, 1), period_months=12)
+        materialize_schedules([loan])
+
+        later = accrue_interest(date(2026, 9, 11))
+        # A missed earlier day can still be caught up after a later one ran
+        earlier = accrue_interest(date(2026, 9, 10))
+        again = accrue_interest(date(2026, 9, 10))
+
+        loan.refresh_from_db()
+        self.assertEqual((later['loans'], earlier['loans'], again['loans']), (1, 1, 0))
+        self.assertEqual(Transaction.objects.filter(loan=loan, transaction_type='INTEREST_ACCRUAL').count(), 2)
+        self.assertEqual(loan.accrued_interest, later['amount'] + earlier['amount'])
+        self.assertEqual(loan.interest_accrued_through, date(2026, 9, 11))
+
+
+@override_settings(**TEST_SETTINGS)
+class LoanRollupTests(TestCase):
+
+    def assertRollupMatchesLoans(self):
+        rollup = LoanDailyStats.objects.aggregate(
+            loans=Sum('loan_count'), amount=Sum('amount_total'), remaining=Sum('remaining_balance_total')
+        )
+        actual = Loan.objects.aggregate(amount=Sum('amount'), remaining=Sum('remaining_balance'))
+        self.assertEqual(rollup['loans'] or 0, Loan.objects.count())
+        self.assertEqual(rollup['amount'] or 0, actual['amount'] or 0)
+        self.assertEqual(rollup['remaining'] or 0, actual['remaining'] or 0)
+
+    def test_save_after_a_concurrent_payment_keeps_the_rollup_in_step(self):
+        loan = create_loan()
+        stale = Loan.objects.get(pk=loan.pk)
+        post_payment(loan.pk, Decimal('2500.00'))
+
+        stale.purpose_description = 'Edited after the payment was posted'
+        stale.save()
+
+        self.assertRollupMatchesLoans()
+
+    def test_delete_all_customers_clears_the_rollup(self):
+        create_loan()
+        create_loan(status='DISBURSED')
+
+        response = self.client.delete(reverse('customer-delete-all'))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(LoanDailyStats.objects.filter(loan_count__gt=0).exists())
+        self.assertFalse(Account.objects.filter(total_loans__gt=0).exists())
+
+    def test_deleting_a_customer_takes_its_loans_out_of_the_rollup(self):
+        borrower = create_customer()
+        create_loan(borrower=borrower)
+        create_loan(borrower=borrower, status='DISBURSED')
+        create_loan()
+
+        response = self.client.delete(reverse('customer-detail', args=[borrower.pk]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Loan.objects.count(), 1)
+        self.assertRollupMatchesLoans()
+
+    def test_queryset_delete_keeps_the_rollup_in_step(self):
+        create_loan()
+        create_loan(status='CLOSED')
+        kept = create_loan(status='DISBURSED')
+
+        Loan.objects.exclude(pk=kept.pk).delete()
+
+        self.assertRollupMatchesLoans()
+
+
+@override_settings(**TEST_SETTINGS)
+class CustomerCounterTests(TestCase):
+
+    def assertCountersMatchLoans(self, account):
+        account.refresh_from_db()
+        loans = Loan.objects.filter(borrower__account=account)
+        self.assertEqual(account.total_loans, loans.count())
+        self.assertEqual(account.loan_amount, loans.aggregate(total=Sum('amount'))['total'] or 0)
+
+    def test_queryset_delete_decrements_the_counters(self):
+        borrower = create_customer()
+        create_loan(borrower=borrower, amount=Decimal('1000.00'))
+        create_loan(borrower=borrower, amount=Decimal('2500.00'))
+        kept = create_loan(borrower=borrower, amount=Decimal('4000.00'))
+
+        Loan.objects.filter(borrower=borrower).exclude(pk=kept.pk).delete()
+
+        self.assertCountersMatchLoans(borrower.account)
+        self.assertEqual(borrower.account.total_loans, 1)
+
+    def test_deleting_a_customer_resets_its_account_counters(self):
+        borrower = create_customer()
+        create_loan(borrower=borrower)
+        create_loan(borrower=borrower, status='DISBURSED')
+
+        response = self.client.delete(reverse('customer-detail', args=[borrower.pk]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertCountersMatchLoans(borrower.account)
+        self.assertEqual(borrower.account.total_loans, 0)
+
+
+@override_settings(**TEST_SETTINGS)
+class LoanListRenderingTests(TestCase):
+
+    def test_values_path_matches_the_serializer(self):
+        borrower = create_customer()
+        create_loan(borrower=borrower, status='PENDING', loan_type='BUSINESS', purpose_description='Stock')
+        create_loan(borrower=borrower, status='ACTIVE', remaining_balance=Decimal('4321.09'),
+                    next_payment_date=date(2026, 11, 1), next_payment_amount=Decimal('933.33'))
+        create_loan(status='CLOSED', remaining_balance=Decimal('0.00'), repayment_progress=100)
+        create_loan(status='REJECTED', amount=Decimal('0.50'), interest_rate=Decimal('0.00'))
+        queryset = Loan.objects.select_related('borrower__account__user').order_by('-created_at', '-id')
+
+        serialized = [dict(item) for item in LoanSerializer(queryset, many=True).data]
+
+        self.assertEqual(serialize_loan_rows(loan_list_rows(queryset)), serialized)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Checks Postgres query plans')
+class RepaymentIndexTests(TestCase):
+    """The repayment list queries can use their partial and composite indexes"""
+
+    def assertUsesIndex(self, queryset, index):
+        with connection.cursor() as cursor:
+            # Small test tables would otherwise always be scanned sequentially
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+
+    def test_overdue_uses_the_open_installment_index(self):
+        today = timezone.localdate()
+        self.assertUsesIndex(
+            Repayment.objects.filter(due_date__lt=today, status__in=Repayment.OPEN_STATUSES).order_by('due_date'),
+            'repayments_open_due_idx',
+        )
+
+    def test_upcoming_uses_the_open_installment_index(self):
+        horizon = timezone.localdate() + timedelta(days=30)
+        self.assertUsesIndex(
+            Repayment.objects.filter(due_date__lte=horizon, status='PENDING').order_by('due_date'),
+            'repayments_open_due_idx',
+        )
+
+    def test_loan_schedule_uses_the_loan_due_index(self):
+        self.assertUsesIndex(Repayment.objects.filter(loan_id=1).order_by('due_date'), 'repayments_loan_due_idx')
+
+
+class LossSimulationTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.exposure = rng.uniform(1000, 50000, 300)
+        self.probability = rng.uniform(0.01, 0.2, 300)
+
+    def test_seeded_runs_match_for_any_worker_count(self):
+        serial = simulate_losses(self.exposure, self.probability, scenarios=2500, seed=42, workers=1)
+        parallel = simulate_losses(self.exposure, self.probability, scenarios=2500, seed=42, workers=3)
+
+        np.testing.assert_array_equal(serial, parallel)
+        self.assertEqual(
+            loss_summary(serial, self.exposure, self.probability),
+            loss_summary(parallel, self.exposure, self.probability),
+        )
+
+    def test_different_seeds_differ(self):
+        first = simulate_losses(self.exposure, self.probability, scenarios=1000, seed=1)
+        second = simulate_losses(self.exposure, self.probability, scenarios=1000, seed=2)
+        self.assertFalse(np.array_equal(first, second))
+
+
+@override_settings(**TEST_SETTINGS)
+class OverdueSweepTests(TestCase):
+
+    def test_reports_only_penalties_actually_charged(self):
+        loan = create_loan()
+        overdue = [
+            Repayment.objects.create(loan=loan, due_date=date(2026, 9, day), amount_due=Decimal('500.00'))
+            for day in (1, 2)
+        ]
+        # Charged before the first installment was reopened
+        Transaction.objects.create(
+            loan=loan, customer=loan.borrower, transaction_type='PENALTY', amount=Decimal('25.00'),
+            reference_number=PENALTY_REFERENCE.format(overdue[0].pk),
+        )
+
+        totals = sweep_overdue(run_date=date(2026, 10, 17))
+
+        self.assertEqual(totals['missed'], 2)
+        self.assertEqual(totals['penalties'], 1)
+        self.assertEqual(Transaction.objects.filter(loan=loan, transaction_type='PENALTY').count(), 2)
+
+
+@override_settings(**TEST_SETTINGS)
+class IdempotencyLockTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_release_leaves_a_lock_taken_over_after_expiry(self):
+        cache.set('idempotency:test:lock', 'second-request')
+        _release('idempotency:test:lock', 'first-request')
+        self.assertEqual(cache.get('idempotency:test:lock'), 'second-request')
+
+        _release('idempotency:test:lock', 'second-request')
+        self.assertIsNone(cache.get('idempotency:test:lock'))
+
+
+@override_settings(**TEST_SETTINGS)
+class ReconciliationTests(TestCase):
+
+    def create_payment(self, loan, amount):
+        return Payment.objects.create(
+            loan=loan, customer=loan.borrower, amount=amount, status='COMPLETED', payment_date=date(2026, 2, 1)
+        )
+
+    def test_already_paid_installment_is_settled(self):
+        loan = create_loan()
+        paid = Repayment.objects.create(
+            loan=loan, installment_number=1, due_date=date(2026, 2, 1),
+            amount_due=Decimal('100.00'), amount_paid=Decimal('100.00'),
+        )
+        Repayment.objects.create(loan=loan, installment_number=2, due_date=date(2026, 3, 1), amount_due=Decimal('100.00'))
+        self.create_payment(loan, Decimal('100.00'))
+
+        totals = reconcile_payments()
+
+        paid.refresh_from_db()
+        self.assertEqual(totals['settled_installments'], 2)
+        self.assertEqual(paid.status, 'ON_TIME')
+        self.assertEqual(paid.payment_date, date(2026, 2, 1))
+
+    def test_unallocated_payment_waits_for_a_schedule(self):
+        loan = create_loan()
+        payment = self.create_payment(loan, Decimal('100.00'))
+
+        reconcile_payments()
+        payment.refresh_from_db()
+        self.assertIsNone(payment.reconciled_at)
+
+        Repayment.objects.create(loan=loan, installment_number=1, due_date=date(2026, 2, 1), amount_due=Decimal('100.00'))
+        reconcile_payments()
+
+        payment.refresh_from_db()
+        self.assertIsNotNone(payment.reconciled_at)
+        self.assertEqual(payment.reconciled_amount, Decimal('100.00'))
+        self.assertEqual(Repayment.objects.get(loan=loan).status, 'ON_TIME')
@@ -17,6 +17,7 @@ from .views.Blacklist import (
 )
 from .views.EwalletPayment import EwalletPaymentViewSet
 from .views.Dashboard import DashboardViewSet
+from .views.QueryMetrics import QueryMetricsViewSet
 
 router = DefaultRouter()
 
@@ -38,6 +39,7 @@ router.register(r'document-verifications', DocumentVerificationViewSet, basename
 router.register(r'audit-logs', AuditLogViewSet, basename='audit-log')
 router.register(r'biometric-data', BiometricDataViewSet, basename='biometric-data')
 router.register(r'ewallet-payments', EwalletPaymentViewSet, basename='ewallet-payment')
+router.register(r'debug/query-metrics', QueryMetricsViewSet, basename='query-metrics')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -0,0 +1,185 @@
+"""
+Repayment schedule engine
+
+Schedules are computed for a whole batch of loans at once as NumPy
+matrices in integer cents, one row per loan and one column per
+installment. Working in cents keeps the reconciliation exact: every
+installment is rounded to the cent and the last one absorbs the rounding,
+so a schedule's principal always adds up to the loan amount to the cent.
+"""
+import calendar
+from decimal import Decimal
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from api.models.Loan import Loan
+from api.models.Repayment import Repayment
+from api.utils.dashboard_cache import schedule_dashboard_refresh
+from api.utils.dashboard_metrics import invalidate_repayment_month
+
+REDUCING_BALANCE = 'REDUCING_BALANCE'
+FLAT = 'FLAT'
+
+SCHEDULE_CHUNK_SIZE = 500
+
+# What the engine reads from each loan
+SCHEDULE_FIELDS = ('id', 'amount', 'interest_rate', 'period_months', 'interest_method', 'start_date')
+
+
+def amortize(principal_cents, annual_rates, periods, methods):
+    """
+    Compute the schedules of many loans at once
+
+    Reducing-balance loans pay a constant annuity, interest being charged
+    monthly on the outstanding balance. Flat loans pay simple interest on
+    the original amount, spread evenly like Loan.calculate_loan_details
+    always has.
+
+    Args:
+        principal_cents: Loan amounts in cents
+        annual_rates: Annual interest rates in percent
+        periods: Number of monthly installments per loan
+        methods: REDUCING_BALANCE or FLAT per loan
+
+    Returns:
+        (principal, interest) int64 arrays of shape (loans, longest period);
+        columns past a loan's own period are zero
+    """
+    amount = np.asarray(principal_cents, dtype=np.int64)
+    periods = np.asarray(periods, dtype=np.int64)
+    flat = np.asarray(methods) == FLAT
+    rate = np.asarray(annual_rates, dtype=np.float64)[:, None] / 1200
+    count = periods[:, None]
+    paid = np.arange(int(periods.max()))[None, :]
+    scheduled = paid < count
+    amount_f = amount[:, None].astype(np.float64)
+
+    # Reducing balance: the annuity is rounded to the cent first and the
+    # balance before each installment follows from it in closed form
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(rate > 0, amount_f * rate / (1 - (1 + rate) ** -count), amount_f / count)
+        payment = np.rint(annuity)
+        growth = (1 + rate) ** paid
+        balance = np.where(rate > 0, amount_f * growth - payment * (growth - 1) / rate, amount_f - payment * paid)
+    reducing_interest = np.rint(balance * rate).astype(np.int64)
+    reducing_principal = payment.astype(np.int64) - reducing_interest
+
+    # Flat: total simple interest, both parts split evenly
+    flat_interest_total = np.rint(amount_f * rate * count).astype(np.int64)
+    flat_interest = np.broadcast_to(flat_interest_total // count, scheduled.shape)
+    flat_principal = np.broadcast_to(amount[:, None] // count, scheduled.shape)
+
+    principal = np.where(flat[:, None], flat_principal, reducing_principal) * scheduled
+    interest = np.where(flat[:, None], flat_interest, reducing_interest) * scheduled
+
+    # The last installment takes up whatever rounding is left
+    rows = np.arange(len(amount))
+    last = periods - 1
+    principal[rows, last] += amount - principal.sum(axis=1)
+    interest[rows, last] += np.where(flat, flat_interest_total[:, 0] - interest.sum(axis=1), 0)
+    return principal, interest
+
+
+def materialize_schedules(loans, chunk_size=SCHEDULE_CHUNK_SIZE):
+    """
+    Replace the pending repayment schedules of loans
+
+    Loans are processed chunk by chunk: one amortize() call, one DELETE of
+    the old pending installments and a bulk_create of the new ones per
+    chunk. Loans that already have a settled or part-paid installment keep
+    their schedule, as do loans without an amount or period. The loans'
+    monthly_payment, total_amount and next payment fields are updated to
+    match the new schedule.
+
+    Args:
+        loans: Loan queryset or iterable of Loan instances
+        chunk_size: Number of loans computed and written together
+
+    Returns:
+        (loans scheduled, repayments created)
+    """
+    if hasattr(loans, 'iterator'):
+        loans = loans.only(*SCHEDULE_FIELDS).iterator(chunk_size=chunk_size)
+    loans = iter(loans)
+
+    scheduled = created = 0
+    while True:
+        chunk = list(islice(loans, chunk_size))
+        if not chunk:
+            break
+        chunk_scheduled, chunk_created = _materialize_chunk(chunk)
+        scheduled += chunk_scheduled
+        created += chunk_created
+    return scheduled, created
+
+
+def _materialize_chunk(loans):
+    settled = set(
+        Repayment.objects.filter(loan_id__in=[loan.pk for loan in loans])
+        .filter(~Q(status='PENDING') | Q(amount_paid__gt=0))
+        .values_list('loan_id', flat=True)
+        .distinct()
+    )
+    loans = [
+        loan for loan in loans
+        if loan.pk not in settled and loan.amount and loan.amount > 0 and loan.period_months and loan.period_months > 0
+    ]
+    if not loans:
+        return 0, 0
+
+    principal, interest = amortize(
+        [int(loan.amount * 100) for loan in loans],
+        [float(loan.interest_rate or 0) for loan in loans],
+        [loan.period_months for loan in loans],
+        [loan.interest_method for loan in loans],
+    )
+    installments = (principal + interest).tolist()
+    principal = principal.tolist()
+    interest = interest.tolist()
+
+    repayments = []
+    for row, loan in enumerate(loans):
+        for number in range(loan.period_months):
+            repayments.append(Repayment(
+                loan=loan,
+                installment_number=number + 1,
+                due_date=add_months(loan.start_date, number + 1),
+                amount_due=from_cents(installments[row][number]),
+                principal_due=from_cents(principal[row][number]),
+                interest_due=from_cents(interest[row][number]),
+            ))
+        loan.monthly_payment = from_cents(installments[row][0])
+        loan.total_amount = from_cents(sum(installments[row][:loan.period_months]))
+        loan.next_payment_amount = loan.monthly_payment
+        loan.next_payment_date = add_months(loan.start_date, 1)
+
+    with transaction.atomic():
+        replaced = Repayment.objects.filter(loan__in=loans)
+        months = set(replaced.dates('due_date', 'month'))
+        replaced.delete()
+        Repayment.objects.bulk_create(repayments, batch_size=1000)
+        # None of these fields feed the rollups Loan.save() maintains
+        Loan.objects.bulk_update(
+            loans, ['monthly_payment', 'total_amount', 'next_payment_amount', 'next_payment_date'], batch_size=1000
+        )
+        # The bulk writes skip Repayment.save(), so drop the cached months here
+        months.update(repayment.due_date.replace(day=1) for repayment in repayments)
+        for month in months:
+            invalidate_repayment_month(month)
+        schedule_dashboard_refresh()
+    return len(loans), len(repayments)
+
+
+def from_cents(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def add_months(day, months):
+    """Same day of the month, clamped to the month's length"""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
@@ -0,0 +1,221 @@
+"""
+Origination cohort (vintage) analytics
+
+Loans are grouped by the month they started. For every cohort and month
+on book (0 = the origination month) LoanCohortStats holds the cumulative
+amount repaid and the loans defaulted so far. A loan defaults on the day
+its first installment reaches DEFAULT_DAYS_PAST_DUE days past due, either
+still unpaid or settled later than that.
+
+refresh_cohorts() only rebuilds the cohorts that changed since the
+previous refresh: cohorts with a new loan or status change, payment or
+written installment, cohorts with an installment that crossed the default
+threshold, and cohorts that are missing the current month on book.
+Loan.updated_at is not used since the nightly interest accrual touches
+every repayable loan; edits to a loan's principal need a --full refresh.
+Changes are looked up from REFRESH_OVERLAP before the previous refresh
+started, so writes that committed while it ran are not missed. Each cohort is
+computed from three grouped queries over its loans, accumulated across
+months on book with NumPy and written as a whole.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, DateField, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from api.models.Loan import Loan
+from api.models.LoanCohortStats import LoanCohortStats
+from api.models.LoanStatusHistory import LoanStatusHistory
+from api.models.Payment import Payment
+from api.models.Repayment import Repayment
+
+DEFAULT_DAYS_PAST_DUE = 90
+
+# How far before the previous refresh changes are looked up again; covers
+# writes that were still uncommitted when it read the tables
+REFRESH_OVERLAP = timedelta(minutes=15)
+
+# Loans that were ever on book
+ORIGINATED_STATUSES = ('DISBURSED', 'ACTIVE', 'CLOSED')
+
+
+def refresh_cohorts(full=False):
+    """
+    Rebuild the cohorts with activity since the previous refresh
+
+    Args:
+        full: Rebuild every cohort instead
+
+    Returns:
+        List of the cohort months rebuilt
+    """
+    now = timezone.now()
+    today = timezone.localdate()
+    originated = Loan.objects.filter(status__in=ORIGINATED_STATUSES)
+
+    last_refresh = LoanCohortStats.objects.aggregate(last=Max('refreshed_at'))['last']
+    if full or last_refresh is None:
+        cohorts = set(_cohort_months(originated))
+        stale = LoanCohortStats.objects.all()
+    else:
+        cohorts = _changed_cohorts(originated, last_refresh, today)
+        stale = LoanCohortStats.objects.filter(cohort_month__in=cohorts)
+
+    rows = _build_rows(sorted(cohorts), today, now) if cohorts else []
+    with transaction.atomic():
+        stale.delete()
+        LoanCohortStats.objects.bulk_create(rows, batch_size=1000)
+    return sorted(cohorts)
+
+
+def cohort_matrix():
+    """
+    Read every vintage curve in one query
+
+    Returns:
+        List of cohorts, oldest first, each with its size and one point per
+        month on book; amounts as strings, rates as percentages of principal
+    """
+    cohorts = []
+    for row in LoanCohortStats.objects.order_by('cohort_month', 'months_on_book').values():
+        if not cohorts or cohorts[-1]['cohort'] != row['cohort_month'].strftime('%Y-%m'):
+            cohorts.append({
+                'cohort': row['cohort_month'].strftime('%Y-%m'),
+                'loans': row['loan_count'],
+                'principal': str(row['principal_total']),
+                'curve': [],
+            })
+        principal = row['principal_total']
+        cohorts[-1]['curve'].append({
+            'months_on_book': row['months_on_book'],
+            'repaid': str(row['repaid_total']),
+            'repaid_rate': round(float(row['repaid_total'] / principal * 100), 2) if principal else 0.0,
+            'defaulted_loans': row['defaulted_count'],
+            'defaulted_principal': str(row['defaulted_principal']),
+            'default_rate': round(float(row['defaulted_principal'] / principal * 100), 2) if principal else 0.0,
+        })
+    return cohorts
+
+
+def _cohort_months(loans):
+    return (
+        loans.annotate(cohort=TruncMonth('start_date'))
+        .values_list('cohort', flat=True)
+        .distinct()
+        .order_by()
+    )
+
+
+def _changed_cohorts(originated, last_refresh, today):
+    threshold = timedelta(days=DEFAULT_DAYS_PAST_DUE)
+    since = last_refresh - REFRESH_OVERLAP
+    # Every loan gets a history row when it is created and on each status change
+    transitioned = LoanStatusHistory.objects.filter(changed_at__gt=since).values('loan_id')
+    paid = Payment.objects.filter(created_at__gt=since).values('loan_id')
+    rescheduled = Repayment.objects.filter(
+        Q(updated_at__gt=since)
+        # Installments that crossed the default threshold since the last refresh
+        | Q(due_date__gt=timezone.localdate(since) - threshold, due_date__lte=today - threshold)
+    ).values('loan_id')
+
+    cohorts = set()
+    for changed in (
+        originated.filter(pk__in=transitioned),
+        originated.filter(pk__in=paid),
+        originated.filter(pk__in=rescheduled),
+    ):
+        cohorts.update(_cohort_months(changed))
+
+    # Cohorts whose curve does not reach the current month yet
+    current = _month_index(today)
+    for cohort_month, months_on_book in (
+        LoanCohortStats.objects.values('cohort_month').annotate(last=Max('months_on_book'))
+        .values_list('cohort_month', 'last').order_by()
+    ):
+        if months_on_book < current - _month_index(cohort_month):
+            cohorts.add(cohort_month)
+    return cohorts
+
+
+def _build_rows(cohorts, today, now):
+    loans = Loan.objects.filter(status__in=ORIGINATED_STATUSES).annotate(cohort=TruncMonth('start_date'))
+    loans = loans.filter(cohort__in=cohorts)
+
+    sizes = {
+        row['cohort']: row
+        for row in loans.values('cohort').annotate(loan_count=Count('id'), principal=Sum('amount')).order_by()
+    }
+    current = _month_index(today)
+    # Loans starting in a future month are not on book yet
+    cohorts = [cohort for cohort in cohorts if cohort in sizes and _month_index(cohort) <= current]
+    if not cohorts:
+        return []
+
+    loans = loans.filter(cohort__in=cohorts)
+    position = {cohort: index for index, cohort in enumerate(cohorts)}
+    width = current - _month_index(cohorts[0]) + 1
+    repaid = np.zeros((len(cohorts), width), dtype=np.int64)
+    defaulted = np.zeros((len(cohorts), width), dtype=np.int64)
+    defaulted_principal = np.zeros((len(cohorts), width), dtype=np.int64)
+
+    def months_on_book(cohort, month):
+        age = current - _month_index(cohort)
+        return min(max(_month_index(month) - _month_index(cohort), 0), age)
+
+    payments = (
+        Payment.objects.filter(status='COMPLETED', loan__in=loans.values('pk'))
+        .annotate(
+            cohort=TruncMonth('loan__start_date'),
+            month=TruncMonth(Coalesce('payment_date', TruncDate('created_at')), output_field=DateField()),
+        )
+        .values('cohort', 'month')
+        .annotate(amount=Sum('amount'))
+        .order_by()
+    )
+    for row in payments:
+        repaid[position[row['cohort']], months_on_book(row['cohort'], row['month'])] += int(row['amount'] * 100)
+
+    threshold = timedelta(days=DEFAULT_DAYS_PAST_DUE)
+    first_defaults = (
+        loans.annotate(first_default=Min(
+            'repayments__due_date',
+            filter=Q(repayments__due_date__lte=today - threshold) & (
+                Q(repayments__status__in=Repayment.OPEN_STATUSES)
+                | Q(repayments__payment_date__gt=F('repayments__due_date') + threshold)
+            ),
+        ))
+        .filter(first_default__isnull=False)
+        .values_list('cohort', 'first_default', 'amount')
+    )
+    for cohort, first_default, amount in first_defaults:
+        column = months_on_book(cohort, first_default + threshold)
+        defaulted[position[cohort], column] += 1
+        defaulted_principal[position[cohort], column] += int(amount * 100)
+
+    repaid = np.cumsum(repaid, axis=1).tolist()
+    defaulted = np.cumsum(defaulted, axis=1).tolist()
+    defaulted_principal = np.cumsum(defaulted_principal, axis=1).tolist()
+
+    rows = []
+    for cohort in cohorts:
+        index = position[cohort]
+        for month in range(current - _month_index(cohort) + 1):
+            rows.append(LoanCohortStats(
+                cohort_month=cohort,
+                months_on_book=month,
+                loan_count=sizes[cohort]['loan_count'],
+                principal_total=sizes[cohort]['principal'] or Decimal('0.00'),
+                repaid_total=Decimal(repaid[index][month]).scaleb(-2),
+                defaulted_count=defaulted[index][month],
+                defaulted_principal=Decimal(defaulted_principal[index][month]).scaleb(-2),
+                refreshed_at=now,
+            ))
+    return rows
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
@@ -0,0 +1,74 @@
+"""
+Helpers that keep the denormalized Account.total_loans / Account.loan_amount
+counters in step with each customer's loans
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from api.models.Account import Account
+from api.models.Loan import Loan
+
+
+def record_customer_loan_change(previous, current):
+    """
+    Move a loan's contribution between borrowers' counters with F() updates
+
+    Args:
+        previous: Mapping with borrower_id and amount as stored before the write, or None for a new loan
+        current: Same mapping after the write, or None for a deleted loan
+    """
+    deltas = {}
+    if previous and previous.get('borrower_id'):
+        count, amount = deltas.get(previous['borrower_id'], (0, Decimal('0.00')))
+        deltas[previous['borrower_id']] = (count - 1, amount - (previous['amount'] or Decimal('0.00')))
+    if current and current.get('borrower_id'):
+        count, amount = deltas.get(current['borrower_id'], (0, Decimal('0.00')))
+        deltas[current['borrower_id']] = (count + 1, amount + (current['amount'] or Decimal('0.00')))
+
+    for borrower_id, (count, amount) in deltas.items():
+        if count or amount:
+            Account.objects.filter(customer__id=borrower_id).update(
+                total_loans=F('total_loans') + count,
+                loan_amount=F('loan_amount') + amount,
+            )
+
+
+def reconcile_customer_counters(dry_run=False):
+    """
+    Recompute every account's counters from the loans table in one UPDATE
+
+    Args:
+        dry_run: Only count the accounts whose counters have drifted
+
+    Returns:
+        Number of accounts that were out of step
+    """
+    loans = Loan.objects.filter(borrower__account=OuterRef('pk')).order_by().values('borrower__account')
+    actual_count = Coalesce(
+        Subquery(loans.annotate(c=Count('id')).values('c')),
+        Value(0),
+        output_field=IntegerField()
+    )
+    actual_amount = Coalesce(
+        Subquery(loans.annotate(s=Sum('amount')).values('s')),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=16, decimal_places=2)
+    )
+
+    with transaction.atomic():
+        drifted = Account.objects.annotate(
+            actual_count=actual_count,
+            actual_amount=actual_amount,
+        ).filter(
+            ~Q(total_loans=F('actual_count')) | ~Q(loan_amount=F('actual_amount'))
+        )
+        drifted_count = drifted.count()
+        if drifted_count and not dry_run:
+            Account.objects.filter(pk__in=drifted.values('pk')).update(
+                total_loans=actual_count,
+                loan_amount=actual_amount,
+            )
+    return drifted_count
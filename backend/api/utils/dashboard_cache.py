@@ -0,0 +1,134 @@
+"""
+Versioned response cache for the dashboard panels
+
+Every cached panel is keyed on a global dashboard version. Writes to loans,
+repayments and payments bump that version once their transaction commits,
+so stale entries are simply never read again instead of waiting on a TTL.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+VERSION_KEY = 'dashboard:version'
+
+# Upper bound on how long an unread entry occupies the cache; freshness is
+# driven by the version, not by this timeout
+PANEL_TIMEOUT = 60 * 60 * 24
+
+CACHED_PANELS = []
+
+
+def get_dashboard_version():
+    """Return the current dashboard version, initialising it if needed"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never repeats
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_dashboard_version():
+    """Invalidate every cached panel"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+
+
+def schedule_dashboard_refresh():
+    """
+    Bump the dashboard version and notify live dashboards once the current
+    transaction commits
+    """
+    from api.utils.websocket_utils import send_dashboard_changed
+    transaction.on_commit(bump_dashboard_version)
+    transaction.on_commit(send_dashboard_changed)
+
+
+def cached_value(name, compute):
+    """
+    Return compute() cached under the current dashboard version, so every
+    live dashboard connection shares one computation per version
+    """
+    key = f"dashboard:value:{name}:v{get_dashboard_version()}:{timezone.localdate().isoformat()}"
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, PANEL_TIMEOUT)
+    return value
+
+
+def cached_panel(panel, bucket='day'):
+    """
+    Cache a dashboard action's successful response under the current version
+
+    Args:
+        panel: Name used in cache keys and hit/miss counters
+        bucket: 'day' or 'hour'; time-relative panels also roll over on this boundary
+    """
+    CACHED_PANELS.append(panel)
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(viewset, request, *args, **kwargs):
+            key = _panel_key(panel, bucket, request)
+            data = cache.get(key)
+            if data is not None:
+                _count(panel, 'hits')
+                return Response(data)
+
+            _count(panel, 'misses')
+            response = view_method(viewset, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, PANEL_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def panel_cache_stats():
+    """Return hit/miss counters for every cached panel"""
+    keys = [_counter_key(panel, kind) for panel in CACHED_PANELS for kind in ('hits', 'misses')]
+    counters = cache.get_many(keys)
+
+    panels = {}
+    for panel in CACHED_PANELS:
+        hits = counters.get(_counter_key(panel, 'hits'), 0)
+        misses = counters.get(_counter_key(panel, 'misses'), 0)
+        total = hits + misses
+        panels[panel] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 1) if total else 0.0,
+        }
+    return {
+        'version': get_dashboard_version(),
+        'panels': panels,
+    }
+
+
+def _panel_key(panel, bucket, request):
+    now = timezone.localtime()
+    period = now.strftime('%Y-%m-%dT%H') if bucket == 'hour' else now.strftime('%Y-%m-%d')
+    params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+    params_hash = hashlib.md5(repr(params).encode()).hexdigest()
+    return f"dashboard:panel:{panel}:v{get_dashboard_version()}:{period}:{params_hash}"
+
+
+def _counter_key(panel, kind):
+    return f"dashboard:counter:{panel}:{kind}"
+
+
+def _count(panel, kind):
+    key = _counter_key(panel, kind)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
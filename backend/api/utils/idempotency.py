@@ -0,0 +1,137 @@
+"""
+Idempotency-Key support for money-moving POST actions
+
+A client that retries a request with the same Idempotency-Key header gets
+the first response back instead of repeating the write. Responses are
+stored in the shared cache under (scope, user, key) together with a hash
+of the request path and body; reusing a key for a different request is
+rejected. Concurrent duplicates are serialized: one request runs, the
+others wait for its stored response. The lock stores a random token per
+request and is only released by the request whose token it still holds,
+so a request that outlived LOCK_TIMEOUT never releases the lock of a
+duplicate that took over after it.
+"""
+import hashlib
+import json
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+# How long a stored response can be replayed
+IDEMPOTENCY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+# Upper bound on how long a request may hold a key, well above any request
+# timeout so a slow request is not run twice, and how long a concurrent
+# duplicate waits for it
+LOCK_TIMEOUT = 120
+WAIT_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+
+MAX_KEY_LENGTH = 255
+
+
+def idempotent(scope):
+    """
+    Replay a POST action's first response for repeated Idempotency-Keys
+
+    Requests without the header run as usual. Only responses below 500 are
+    stored, so a request that failed on the server can be retried with the
+    same key.
+
+    Args:
+        scope: Name of the action, part of the cache keys
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(viewset, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view_method(viewset, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            response_key = _response_key(scope, request, key)
+            lock_key = f"{response_key}:lock"
+            body_hash = _body_hash(request)
+
+            token = uuid.uuid4().hex
+            stored = cache.get(response_key)
+            if stored is None and not cache.add(lock_key, token, LOCK_TIMEOUT):
+                stored = _wait_for_response(response_key)
+                if stored is None:
+                    return Response(
+                        {'error': 'A request with this Idempotency-Key is still being processed'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+            if stored is not None:
+                return _replay(stored, body_hash)
+
+            try:
+                # The first holder may have finished between our read and add
+                stored = cache.get(response_key)
+                if stored is not None:
+                    return _replay(stored, body_hash)
+
+                response = view_method(viewset, request, *args, **kwargs)
+                if response.status_code < 500:
+                    cache.set(response_key, {
+                        'body_hash': body_hash,
+                        'status': response.status_code,
+                        'data': response.data,
+                    }, IDEMPOTENCY_TTL)
+                return response
+            finally:
+                _release(lock_key, token)
+        return wrapper
+    return decorator
+
+
+def _release(lock_key, token):
+    # Our lock may have expired and been taken by a duplicate; leave theirs
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _replay(stored, body_hash):
+    if stored['body_hash'] != body_hash:
+        return Response(
+            {'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(stored['data'], status=stored['status'], headers={REPLAY_HEADER: 'true'})
+
+
+def _wait_for_response(response_key):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        stored = cache.get(response_key)
+        if stored is not None:
+            return stored
+    return None
+
+
+def _response_key(scope, request, key):
+    user_id = request.user.pk if request.user.is_authenticated else 'anonymous'
+    key_hash = hashlib.sha256(key.encode()).hexdigest()
+    return f"idempotency:{scope}:{user_id}:{key_hash}"
+
+
+def _body_hash(request):
+    """Hash of the path and body, so a key reused on another object is caught too"""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps([request.path, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -0,0 +1,176 @@
+"""
+Daily interest accrual for the repayable loan book
+
+Interest is recognised day by day along each loan's repayment schedule:
+the interest of the installment covering a day is spread evenly over the
+days of its period. The amount recognised through day n of a period is
+round_half_up(interest * n / period_days) in integer cents, and a day's
+accrual is the difference between two such amounts, so the accruals of a
+period always add up to its scheduled interest to the cent.
+
+remaining_balance already contains the scheduled interest, so accrual
+moves it into Loan.accrued_interest (revenue earned to date) rather than
+adding to the balance.
+
+Loans are processed in id-ordered chunks, each computed as NumPy int64
+arrays. A day's accrual on a loan is its INTEREST_ACCRUAL transaction,
+whose reference_number is unique per loan and day. The transactions are
+inserted with ON CONFLICT DO NOTHING ... RETURNING and only the rows
+actually inserted are added to the loans' accrued_interest, in the same
+transaction. Any day can therefore be run, rerun or caught up later, in
+any order, without accruing a loan twice or leaving a gap;
+interest_accrued_through is the latest day accrued. Loans already
+accrued for the day are skipped up front through the reference index.
+
+The loan write leaves updated_at alone: accrual is not a change to the
+loan other jobs need to pick up.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import CharField, Exists, OuterRef, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from api.models.Loan import Loan
+from api.models.Repayment import Repayment
+from api.models.Transaction import Transaction
+from api.utils.amortization import add_months, from_cents
+from api.utils.payments import PAYABLE_STATUSES
+
+ACCRUAL_CHUNK_SIZE = 2000
+
+ACCRUAL_REFERENCE = 'ACCRUAL-{}-{:%Y%m%d}'
+
+_INSERT_ACCRUALS = """
+    INSERT INTO {transactions} (loan_id, customer_id, transaction_type, amount, description, reference_number,
+                                created_at, updated_at)
+    SELECT accrual.loan_id, accrual.customer_id, 'INTEREST_ACCRUAL', accrual.amount, %(description)s,
+           accrual.reference, %(now)s, %(now)s
+    FROM unnest(%(loan_ids)s::bigint[], %(customer_ids)s::bigint[], %(amounts)s::numeric[], %(references)s::text[])
+        AS accrual(loan_id, customer_id, amount, reference)
+    ON CONFLICT (reference_number) DO NOTHING
+    RETURNING loan_id, amount
+"""
+
+_APPLY_ACCRUALS = """
+    UPDATE {loans} AS loan
+    SET accrued_interest = loan.accrued_interest + accrual.amount,
+        interest_accrued_through = GREATEST(loan.interest_accrued_through, %(run_date)s)
+    FROM unnest(%(loan_ids)s::bigint[], %(amounts)s::numeric[]) AS accrual(loan_id, amount)
+    WHERE loan.id = accrual.loan_id
+"""
+
+
+def accrue_interest(run_date=None, chunk_size=ACCRUAL_CHUNK_SIZE):
+    """
+    Accrue one day of interest on every repayable loan
+
+    Args:
+        run_date: Day to accrue, defaults to today
+        chunk_size: Loans computed and written per transaction
+
+    Returns:
+        Dictionary with the number of loans accrued, loans skipped because
+        no installment covers the day, and the total amount accrued
+    """
+    run_date = run_date or timezone.localdate()
+    totals = {'loans': 0, 'skipped': 0, 'amount': Decimal('0.00')}
+    accrued = Transaction.objects.filter(
+        reference_number=Concat(
+            Value('ACCRUAL-'), Cast(OuterRef('pk'), CharField()), Value(f'-{run_date:%Y%m%d}'),
+            output_field=CharField(),
+        ),
+    )
+    last_id = 0
+    while True:
+        loans = list(
+            Loan.objects.filter(pk__gt=last_id, status__in=PAYABLE_STATUSES, start_date__lt=run_date)
+            .exclude(Exists(accrued))
+            .order_by('pk')
+            .values_list('id', 'borrower_id', 'start_date')[:chunk_size]
+        )
+        if not loans:
+            break
+        with transaction.atomic():
+            accrued_loans, skipped, amount = _accrue_chunk(loans, run_date)
+        totals['loans'] += accrued_loans
+        totals['skipped'] += skipped
+        totals['amount'] += amount
+        last_id = loans[-1][0]
+    return totals
+
+
+def daily_accruals(interest_cents, elapsed_days, period_days):
+    """
+    Interest recognised on one day of each period, in cents
+
+    Args:
+        interest_cents: int64 array, scheduled interest of each period
+        elapsed_days: int64 array, days from the period start to the day (1 on its first day)
+        period_days: int64 array, length of each period in days
+
+    Returns:
+        int64 array of the day's accruals
+    """
+    period_days = np.maximum(period_days, 1)
+
+    def through(days):
+        # round_half_up(interest * days / period) without leaving integers
+        return (2 * interest_cents * days + period_days) // (2 * period_days)
+
+    return through(np.clip(elapsed_days, 0, period_days)) - through(np.clip(elapsed_days - 1, 0, period_days))
+
+
+def _accrue_chunk(loans, run_date):
+    # The installment covering run_date is each loan's first one due on or after it
+    covering = {
+        row['loan_id']: row
+        for row in Repayment.objects.filter(loan_id__in=[loan_id for loan_id, _, _ in loans], due_date__gte=run_date)
+        .order_by('loan_id', 'due_date')
+        .distinct('loan_id')
+        .values('loan_id', 'installment_number', 'due_date', 'interest_due')
+    }
+
+    scheduled = [loan for loan in loans if loan[0] in covering]
+    interest, elapsed, period = [], [], []
+    for loan_id, _, start_date in scheduled:
+        installment = covering[loan_id]
+        if installment['installment_number']:
+            period_start = add_months(start_date, installment['installment_number'] - 1)
+        else:
+            period_start = max(add_months(installment['due_date'], -1), start_date)
+        interest.append(int(installment['interest_due'] * 100))
+        elapsed.append((run_date - period_start).days)
+        period.append((installment['due_date'] - period_start).days)
+
+    accruals = daily_accruals(
+        np.array(interest, dtype=np.int64),
+        np.array(elapsed, dtype=np.int64),
+        np.array(period, dtype=np.int64),
+    ).tolist() if scheduled else []
+
+    due = [(loan, from_cents(cents)) for loan, cents in zip(scheduled, accruals) if cents > 0]
+    skipped = len(loans) - len(scheduled)
+    if not due:
+        return 0, skipped, Decimal('0.00')
+
+    with connection.cursor() as cursor:
+        cursor.execute(_INSERT_ACCRUALS.format(transactions=Transaction._meta.db_table), {
+            'loan_ids': [loan_id for (loan_id, _, _), _ in due],
+            'customer_ids': [borrower_id for (_, borrower_id, _), _ in due],
+            'amounts': [amount for _, amount in due],
+            'references': [ACCRUAL_REFERENCE.format(loan_id, run_date) for (loan_id, _, _), _ in due],
+            'description': f'Interest accrued for {run_date}',
+            'now': timezone.now(),
+        })
+        # Rows another run inserted first are not returned and not applied again
+        inserted = cursor.fetchall()
+        if inserted:
+            cursor.execute(_APPLY_ACCRUALS.format(loans=Loan._meta.db_table), {
+                'loan_ids': [loan_id for loan_id, _ in inserted],
+                'amounts': [amount for _, amount in inserted],
+                'run_date': run_date,
+            })
+    return len(inserted), skipped, sum((amount for _, amount in inserted), Decimal('0.00'))
@@ -0,0 +1,63 @@
+"""
+Keyset (seek) pagination helpers over a (created_at, id) ordering
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    """Encode a (created_at, id) position as an opaque URL-safe token"""
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a token produced by encode_cursor
+
+    Raises:
+        InvalidCursor: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def parse_since(value):
+    """
+    Parse a lower bound given either as a cursor token or an ISO datetime
+
+    Returns:
+        (created_at, id) tuple; id is None when a plain datetime was given
+    """
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError:
+        return decode_cursor(value)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since, None
+
+
+def before(position, field='created_at'):
+    """Q matching rows strictly older than position in (field, id) order"""
+    created_at, pk = position
+    return Q(**{f'{field}__lt': created_at}) | Q(**{field: created_at, 'id__lt': pk})
+
+
+def after(position, field='created_at'):
+    """Q matching rows strictly newer than position in (field, id) order"""
+    created_at, pk = position
+    if pk is None:
+        return Q(**{f'{field}__gt': created_at})
+    return Q(**{f'{field}__gt': created_at}) | Q(**{field: created_at, 'id__gt': pk})
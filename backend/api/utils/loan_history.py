@@ -0,0 +1,87 @@
+"""
+Time-travel queries over the append-only loan status history
+
+Every loan has a history row for its creation and one per status change,
+so the status a loan had at any moment is its latest row at or before that
+moment. Both queries here are answered by the (loan, changed_at) and
+(to_status, changed_at) indexes in a single statement.
+"""
+from datetime import datetime
+
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from api.models.Loan import Loan
+from api.models.LoanStatusHistory import LoanStatusHistory
+
+
+def parse_timestamp(value):
+    """
+    Parse an ISO date or datetime query parameter into an aware datetime
+
+    Raises:
+        ValueError: If value is not ISO formatted
+    """
+    moment = datetime.fromisoformat(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def status_as_of(at):
+    """Subquery expression for a loan's status at the given moment"""
+    return Subquery(
+        LoanStatusHistory.objects.filter(loan=OuterRef('pk'), changed_at__lte=at)
+        .order_by('-changed_at', '-id')
+        .values('to_status')[:1]
+    )
+
+
+def portfolio_as_of(at, loan_type=None):
+    """
+    Reconstruct the loan book as it stood at a moment, in one query
+
+    Loans are counted under the status they had at that moment; loans
+    created later are left out. Only the status is historical: amounts are
+    the loans' principal, which does not change after creation.
+
+    Args:
+        at: Aware datetime
+        loan_type: Optional loan type to restrict the book to
+
+    Returns:
+        List of {'status', 'loans', 'amount'} ordered by status
+    """
+    loans = Loan.objects.filter(created_at__lte=at)
+    if loan_type:
+        loans = loans.filter(loan_type=loan_type)
+    rows = (
+        loans.annotate(status_then=status_as_of(at))
+        .values('status_then')
+        .annotate(loans=Count('id'), amount=Sum('amount'))
+        .order_by('status_then')
+    )
+    return [
+        {'status': row['status_then'], 'loans': row['loans'], 'amount': row['amount']}
+        for row in rows
+        if row['status_then'] is not None
+    ]
+
+
+def transition_counts(start, end, to_status=None):
+    """
+    Count status transitions made in [start, end)
+
+    Args:
+        start: Aware datetime, inclusive
+        end: Aware datetime, exclusive
+        to_status: Optional status to count transitions into
+
+    Returns:
+        {(from_status, to_status): count}
+    """
+    history = LoanStatusHistory.objects.filter(changed_at__gte=start, changed_at__lt=end)
+    if to_status:
+        history = history.filter(to_status=to_status)
+    rows = history.values('from_status', 'to_status').annotate(transitions=Count('id')).order_by()
+    return {(row['from_status'], row['to_status']): row['transitions'] for row in rows}
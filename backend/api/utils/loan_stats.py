@@ -0,0 +1,288 @@
+"""
+Helpers that keep the LoanDailyStats rollup in step with the loans table
+"""
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.models.Loan import Loan
+from api.models.LoanDailyStats import LoanDailyStats
+from api.models.LoanStatusHistory import LoanStatusHistory
+from api.models.Payment import Payment
+from api.utils.dashboard_cache import schedule_dashboard_refresh
+
+ROLLUP_FIELDS = ('created_at', 'status', 'loan_type', 'amount', 'remaining_balance')
+
+# Everything Loan.save() compares against the stored row: the rollup fields
+# plus what the per-customer counters depend on
+TRACKED_FIELDS = ROLLUP_FIELDS + ('borrower_id',)
+
+
+def loan_snapshot(values):
+    """
+    Build the rollup contribution of a single loan
+
+    Args:
+        values: Mapping with the ROLLUP_FIELDS of a loan, or None
+
+    Returns:
+        ((day, status, loan_type), amount, remaining_balance) or None
+    """
+    if not values or values.get('created_at') is None:
+        return None
+    day = timezone.localdate(values['created_at'])
+    return (
+        (day, values['status'], values['loan_type']),
+        values['amount'] or Decimal('0.00'),
+        values['remaining_balance'] or Decimal('0.00'),
+    )
+
+
+def record_loan_change(previous, current):
+    """
+    Move a loan's contribution from its previous bucket to its current one
+
+    Args:
+        previous: ROLLUP_FIELDS mapping as loaded from the database, or None for a new loan
+        current: ROLLUP_FIELDS mapping after the write, or None for a deleted loan
+    """
+    record_loan_changes([(previous, current)])
+
+
+def record_loan_changes(changes):
+    """
+    Apply many loans' (previous, current) changes, netted per rollup bucket
+    so each touched bucket is written once
+
+    Args:
+        changes: Iterable of (previous, current) pairs as taken by record_loan_change
+    """
+    deltas = defaultdict(lambda: [0, Decimal('0.00'), Decimal('0.00')])
+    for previous, current in changes:
+        for snapshot, sign in ((loan_snapshot(previous), -1), (loan_snapshot(current), 1)):
+            if snapshot:
+                key, amount, remaining = snapshot
+                deltas[key][0] += sign
+                deltas[key][1] += sign * amount
+                deltas[key][2] += sign * remaining
+
+    for key, (count, amount, remaining) in deltas.items():
+        if count or amount or remaining:
+            _apply_delta(key, count, amount, remaining)
+
+
+def bulk_update_status(queryset, status):
+    """
+    Move every loan in a queryset to a new status with a single UPDATE,
+    shifting their rollup contributions and recording the transitions
+    in the same transaction
+
+    Args:
+        queryset: Loans to transition
+        status: New loan status
+
+    Returns:
+        Number of loans updated
+    """
+    with transaction.atomic():
+        current_statuses = dict(queryset.select_for_update().values_list('pk', 'status'))
+        if not current_statuses:
+            return 0
+
+        loans = Loan.objects.filter(pk__in=list(current_statuses))
+        buckets = loans.annotate(
+            day=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+        ).values('day', 'status', 'loan_type').annotate(
+            loan_count=Count('id'),
+            amount_total=Sum('amount'),
+            remaining_balance_total=Sum('remaining_balance'),
+        ).order_by()
+
+        for bucket in buckets:
+            if bucket['status'] == status:
+                continue
+            count = bucket['loan_count']
+            amount = bucket['amount_total'] or Decimal('0.00')
+            remaining = bucket['remaining_balance_total'] or Decimal('0.00')
+            _apply_delta((bucket['day'], bucket['status'], bucket['loan_type']), -count, -amount, -remaining)
+            _apply_delta((bucket['day'], status, bucket['loan_type']), count, amount, remaining)
+
+        LoanStatusHistory.objects.bulk_create([
+            LoanStatusHistory(loan_id=loan_id, from_status=from_status, to_status=status)
+            for loan_id, from_status in current_statuses.items()
+            if from_status != status
+        ], batch_size=1000)
+
+        schedule_dashboard_refresh()
+        return loans.update(status=status, updated_at=timezone.now())
+
+
+def transition_loans(loan_ids, status, from_statuses):
+    """
+    Move loans to a new status with a single UPDATE ... RETURNING
+
+    Only loans currently in one of from_statuses are touched; they are
+    locked, updated and returned with their previous status in one
+    statement. Their rollup contributions and status history follow in
+    the same transaction.
+
+    Args:
+        loan_ids: Ids of the loans to transition
+        status: New loan status
+        from_statuses: Statuses a loan may be moved out of
+
+    Returns:
+        List of dictionaries with id, from_status, borrower_id, loan_type,
+        amount, remaining_balance and created_at of every updated loan
+    """
+    table = Loan._meta.db_table
+    sql = f"""
+        UPDATE {table} AS loan
+        SET status = %s, updated_at = %s
+        FROM (
+            SELECT id, status FROM {table}
+            WHERE id = ANY(%s) AND status = ANY(%s)
+            FOR UPDATE
+        ) AS previous
+        WHERE loan.id = previous.id
+        RETURNING loan.id, previous.status, loan.borrower_id, loan.loan_type,
+                  loan.amount, loan.remaining_balance, loan.created_at
+    """
+    columns = ('id', 'from_status', 'borrower_id', 'loan_type', 'amount', 'remaining_balance', 'created_at')
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [status, timezone.now(), list(loan_ids), list(from_statuses)])
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if not rows:
+            return rows
+
+        record_loan_changes(
+            ({**row, 'status': row['from_status']}, {**row, 'status': status})
+            for row in rows
+        )
+
+        LoanStatusHistory.objects.bulk_create([
+            LoanStatusHistory(loan_id=row['id'], from_status=row['from_status'], to_status=status)
+            for row in rows
+        ], batch_size=1000)
+
+        schedule_dashboard_refresh()
+    return rows
+
+
+def open_balances(loan_ids):
+    """
+    Make loans that have taken no payments owe their total_amount, with a
+    single UPDATE ... RETURNING
+
+    Meant to run once materialize_schedules has set total_amount from the
+    new schedule, so the balance matches the schedule rather than whatever
+    estimate the loan was created with. The rollup moves by the difference.
+
+    Args:
+        loan_ids: Ids of the loans to open
+
+    Returns:
+        Number of loans whose balance changed
+    """
+    table = Loan._meta.db_table
+    payments = Payment._meta.db_table
+    sql = f"""
+        UPDATE {table} AS loan
+        SET remaining_balance = loan.total_amount, updated_at = %s
+        FROM (
+            SELECT id, remaining_balance FROM {table}
+            WHERE id = ANY(%s)
+        ) AS previous
+        WHERE loan.id = previous.id
+          AND loan.total_amount > 0
+          AND loan.remaining_balance <> loan.total_amount
+          AND NOT EXISTS (SELECT 1 FROM {payments} WHERE {payments}.loan_id = loan.id)
+        RETURNING loan.id, loan.status, loan.loan_type, loan.amount, previous.remaining_balance,
+                  loan.remaining_balance, loan.created_at
+    """
+    columns = (
+        'id', 'status', 'loan_type', 'amount', 'from_remaining_balance', 'remaining_balance', 'created_at',
+    )
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [timezone.now(), list(loan_ids)])
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if not rows:
+            return 0
+
+        record_loan_changes(
+            ({**row, 'remaining_balance': row['from_remaining_balance']}, row)
+            for row in rows
+        )
+        schedule_dashboard_refresh()
+    return len(rows)
+
+
+def rebuild_loan_daily_stats(since=None):
+    """
+    Recompute the rollup from the loans table
+
+    Args:
+        since: Optional date; only buckets from this day onwards are rebuilt
+
+    Returns:
+        Number of rollup rows written
+    """
+    tz = timezone.get_current_timezone()
+    loans = Loan.objects.all()
+    existing = LoanDailyStats.objects.all()
+    if since:
+        loans = loans.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min), tz))
+        existing = existing.filter(day__gte=since)
+
+    buckets = loans.annotate(
+        day=TruncDate('created_at', tzinfo=tz)
+    ).values('day', 'status', 'loan_type').annotate(
+        loan_count=Count('id'),
+        amount_total=Sum('amount'),
+        remaining_balance_total=Sum('remaining_balance'),
+    ).order_by()
+
+    with transaction.atomic():
+        existing.delete()
+        created = LoanDailyStats.objects.bulk_create(
+            [LoanDailyStats(**bucket) for bucket in buckets],
+            batch_size=1000
+        )
+        schedule_dashboard_refresh()
+    return len(created)
+
+
+def _apply_delta(key, count, amount, remaining):
+    """Add a delta to one rollup bucket, creating the bucket if needed"""
+    day, status, loan_type = key
+    updated = LoanDailyStats.objects.filter(day=day, status=status, loan_type=loan_type).update(
+        loan_count=F('loan_count') + count,
+        amount_total=F('amount_total') + amount,
+        remaining_balance_total=F('remaining_balance_total') + remaining,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            LoanDailyStats.objects.create(
+                day=day,
+                status=status,
+                loan_type=loan_type,
+                loan_count=count,
+                amount_total=amount,
+                remaining_balance_total=remaining,
+            )
+    except IntegrityError:
+        # Another writer created the bucket first; add to it instead
+        _apply_delta(key, count, amount, remaining)
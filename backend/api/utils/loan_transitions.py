@@ -0,0 +1,121 @@
+"""
+Set-based loan status transitions with batched notifications
+"""
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.models.Customer import Customer
+from api.models.Loan import Loan
+from api.models.Notification import Notification
+from api.utils.amortization import materialize_schedules
+from api.utils.loan_stats import open_balances, transition_loans
+from api.utils.websocket_utils import send_group_messages
+
+# Target status -> statuses a loan may move out of to reach it
+ALLOWED_TRANSITIONS = {
+    'APPROVED': ('PENDING',),
+    'REJECTED': ('PENDING',),
+    'DISBURSED': ('APPROVED',),
+    'ACTIVE': ('DISBURSED',),
+    'CLOSED': ('DISBURSED', 'ACTIVE'),
+}
+
+# Target status -> (notification type, title, default message)
+STATUS_NOTIFICATIONS = {
+    'APPROVED': ('LOAN_APPROVED', 'Loan Approved', 'Your loan has been approved!'),
+    'REJECTED': ('LOAN_REJECTED', 'Loan Rejected', 'Your loan has been rejected.'),
+    'DISBURSED': ('SYSTEM_UPDATE', 'Loan Disbursed', 'Your loan has been disbursed!'),
+    'ACTIVE': ('SYSTEM_UPDATE', 'Loan Activated', 'Your loan is now active.'),
+    'CLOSED': ('SYSTEM_UPDATE', 'Loan Closed', 'Your loan has been closed.'),
+}
+
+MAX_BULK_TRANSITION = 1000
+
+
+def bulk_transition(loan_ids, status, message=''):
+    """
+    Transition many loans and notify their borrowers in batches
+
+    The loans are moved with one UPDATE ... RETURNING, disbursed loans get
+    their repayment schedules and then start owing the schedule's total,
+    and every borrower gets one Notification row
+    (a single bulk INSERT). Once the transaction commits, status and unread
+    count events go out in one channel layer batch, the unread counts coming
+    from a single GROUP BY.
+
+    Args:
+        loan_ids: Ids of the loans to transition
+        status: Target status, a key of ALLOWED_TRANSITIONS
+        message: Notification message, defaults to one per status
+
+    Returns:
+        (ids of the transitioned loans, {id: current status} of the skipped ones)
+    """
+    from_statuses = ALLOWED_TRANSITIONS[status]
+    notification_type, title, default_message = STATUS_NOTIFICATIONS[status]
+    message = message or default_message
+    loan_ids = set(loan_ids)
+
+    with transaction.atomic():
+        rows = transition_loans(loan_ids, status, from_statuses)
+        updated = [row['id'] for row in rows]
+        if status == 'DISBURSED' and updated:
+            materialize_schedules(Loan.objects.filter(pk__in=updated))
+            open_balances(updated)
+
+        borrower_users = dict(
+            Customer.objects.filter(pk__in={row['borrower_id'] for row in rows})
+            .values_list('pk', 'account__user_id')
+        )
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=borrower_users[row['borrower_id']],
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                loan_id=row['id'],
+                amount=row['amount'],
+            )
+            for row in rows
+            if row['borrower_id'] in borrower_users
+        ], batch_size=1000)
+
+        missing = loan_ids.difference(updated)
+        skipped = dict(Loan.objects.filter(pk__in=missing).values_list('pk', 'status')) if missing else {}
+
+        if notifications:
+            transaction.on_commit(lambda: _dispatch_status_events(notifications, status, message))
+    return updated, skipped
+
+
+def _dispatch_status_events(notifications, status, message):
+    user_ids = {notification.user_id for notification in notifications}
+    unread_counts = dict(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .values('user_id')
+        .annotate(unread=Count('id'))
+        .values_list('user_id', 'unread')
+        .order_by()
+    )
+    updated_at = timezone.now().isoformat()
+
+    messages = [
+        (f'loan_updates_{notification.user_id}', {
+            'type': 'loan_status_changed',
+            'loan_id': notification.loan_id,
+            'status': status,
+            'message': message,
+            'updated_at': updated_at,
+        })
+        for notification in notifications
+    ]
+    messages += [
+        (f'notifications_{user_id}', {'type': 'unread_count', 'count': unread_counts.get(user_id, 0)})
+        for user_id in user_ids
+    ]
+    try:
+        send_group_messages(messages)
+    except Exception as e:
+        # Notifications are already stored; a missed live push must not fail the request
+        print(f"Error sending loan status events: {e}")
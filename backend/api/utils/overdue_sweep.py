@@ -0,0 +1,211 @@
+"""
+Nightly overdue sweep
+
+Run once a day (manage.py sweep_overdue_repayments). Three set-based passes,
+each committed batch by batch:
+
+1. PENDING installments past their due date (plus OVERDUE_GRACE_DAYS) on
+   repayable loans become MISSED with one UPDATE ... RETURNING per batch.
+2. Every installment marked MISSED gets one PENALTY Transaction, bulk
+   inserted in the same transaction. Its reference_number is derived from
+   the installment, so a penalty can never be charged twice.
+3. Installments due within PAYMENT_REMINDER_DAYS get a PAYMENT_DUE
+   notification and a payment_due_reminder event, and are stamped with
+   reminder_sent_on so they are reminded once.
+
+Every pass only selects rows the previous runs have not handled yet, so the
+sweep can be stopped at any point and rerun for the same date without
+marking, charging or reminding anything twice.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.models.Customer import Customer
+from api.models.Loan import Loan
+from api.models.Notification import Notification
+from api.models.Repayment import Repayment
+from api.models.Transaction import Transaction
+from api.utils.dashboard_cache import schedule_dashboard_refresh
+from api.utils.dashboard_metrics import invalidate_repayment_month
+from api.utils.payments import PAYABLE_STATUSES
+from api.utils.websocket_utils import payment_due_reminder_message, send_group_messages
+
+SWEEP_BATCH_SIZE = 1000
+
+OVERDUE_GRACE_DAYS = getattr(settings, 'OVERDUE_GRACE_DAYS', 0)
+LATE_PENALTY_RATE = Decimal(str(getattr(settings, 'LATE_PENALTY_RATE', '0.05')))
+PAYMENT_REMINDER_DAYS = getattr(settings, 'PAYMENT_REMINDER_DAYS', 3)
+
+PENALTY_REFERENCE = 'PENALTY-{}'
+
+# Locks one batch of matching pending installments on repayable loans,
+# skipping rows another sweep already holds, and updates them in place
+_BATCH_UPDATE = """
+    UPDATE {repayments} AS repayment
+    SET {assignments}, updated_at = %(now)s
+    FROM {loans} AS loan
+    WHERE repayment.id IN (
+        SELECT pending.id FROM {repayments} AS pending
+        JOIN {loans} AS pending_loan ON pending_loan.id = pending.loan_id
+        WHERE pending.status = 'PENDING' AND pending_loan.status = ANY(%(payable)s) AND {condition}
+        ORDER BY pending.id
+        LIMIT %(limit)s
+        FOR UPDATE OF pending SKIP LOCKED
+    )
+    AND loan.id = repayment.loan_id
+    RETURNING repayment.id, repayment.loan_id, loan.borrower_id, repayment.due_date,
+              repayment.amount_due - repayment.amount_paid
+"""
+
+
+def sweep_overdue(run_date=None, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Mark missed installments, charge their penalties and send due reminders
+
+    Args:
+        run_date: Date the sweep runs for, defaults to today
+        batch_size: Installments locked and written per transaction
+
+    Returns:
+        Dictionary with the number of installments marked missed, penalties
+        charged and reminders sent
+    """
+    run_date = run_date or timezone.localdate()
+    totals = {'missed': 0, 'penalties': 0, 'reminders': 0}
+
+    cutoff = run_date - timedelta(days=OVERDUE_GRACE_DAYS)
+    while True:
+        missed, penalties = _mark_missed_batch(cutoff, batch_size)
+        if not missed:
+            break
+        totals['missed'] += missed
+        totals['penalties'] += penalties
+
+    horizon = run_date + timedelta(days=PAYMENT_REMINDER_DAYS)
+    while True:
+        handled, reminders = _remind_batch(run_date, horizon, batch_size)
+        if not handled:
+            break
+        totals['reminders'] += reminders
+
+    return totals
+
+
+def _mark_missed_batch(cutoff, batch_size):
+    with transaction.atomic():
+        rows = _update_batch(
+            "status = 'MISSED'",
+            'pending.due_date < %(cutoff)s',
+            {'cutoff': cutoff},
+            batch_size,
+        )
+        if not rows:
+            return 0, 0
+
+        # A penalty already charged survives its installment being reopened;
+        # the installments are locked, so no other sweep can charge them now
+        charged = set(
+            Transaction.objects.filter(
+                reference_number__in=[PENALTY_REFERENCE.format(row[0]) for row in rows]
+            ).values_list('reference_number', flat=True)
+        )
+        penalties = []
+        for repayment_id, loan_id, borrower_id, due_date, outstanding in rows:
+            amount = (outstanding * LATE_PENALTY_RATE).quantize(Decimal('0.01'))
+            if amount <= 0 or PENALTY_REFERENCE.format(repayment_id) in charged:
+                continue
+            penalties.append(Transaction(
+                loan_id=loan_id,
+                customer_id=borrower_id,
+                transaction_type='PENALTY',
+                amount=amount,
+                description=f'Late payment penalty on the installment due {due_date}',
+                reference_number=PENALTY_REFERENCE.format(repayment_id),
+            ))
+        Transaction.objects.bulk_create(penalties, batch_size=1000)
+
+        # The UPDATE bypasses Repayment.save(), so drop the cached months here
+        for month in {row[3].replace(day=1) for row in rows}:
+            invalidate_repayment_month(month)
+        schedule_dashboard_refresh()
+    return len(rows), len(penalties)
+
+
+def _remind_batch(run_date, horizon, batch_size):
+    with transaction.atomic():
+        rows = _update_batch(
+            'reminder_sent_on = %(run_date)s',
+            'pending.reminder_sent_on IS NULL AND pending.due_date BETWEEN %(run_date)s AND %(horizon)s',
+            {'run_date': run_date, 'horizon': horizon},
+            batch_size,
+        )
+        if not rows:
+            return 0, 0
+
+        borrower_users = dict(
+            Customer.objects.filter(pk__in={row[2] for row in rows}).values_list('pk', 'account__user_id')
+        )
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=borrower_users[borrower_id],
+                notification_type='PAYMENT_DUE',
+                title='Payment Due',
+                message=f'Your installment of R {outstanding:,.2f} is due on {due_date:%d %b %Y}.',
+                loan_id=loan_id,
+                amount=outstanding,
+            )
+            for repayment_id, loan_id, borrower_id, due_date, outstanding in rows
+            if borrower_users.get(borrower_id)
+        ], batch_size=1000)
+
+        reminders = [
+            (borrower_users[borrower_id], loan_id, due_date, outstanding)
+            for repayment_id, loan_id, borrower_id, due_date, outstanding in rows
+            if borrower_users.get(borrower_id)
+        ]
+        if reminders:
+            transaction.on_commit(lambda: _dispatch_reminders(reminders))
+    return len(rows), len(notifications)
+
+
+def _update_batch(assignments, condition, params, batch_size):
+    sql = _BATCH_UPDATE.format(
+        repayments=Repayment._meta.db_table,
+        loans=Loan._meta.db_table,
+        assignments=assignments,
+        condition=condition,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            **params,
+            'now': timezone.now(),
+            'payable': list(PAYABLE_STATUSES),
+            'limit': batch_size,
+        })
+        return cursor.fetchall()
+
+
+def _dispatch_reminders(reminders):
+    user_ids = {user_id for user_id, *_ in reminders}
+    unread_counts = dict(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .values('user_id')
+        .annotate(unread=Count('id'))
+        .values_list('user_id', 'unread')
+        .order_by()
+    )
+    messages = [payment_due_reminder_message(*reminder) for reminder in reminders]
+    messages += [
+        (f'notifications_{user_id}', {'type': 'unread_count', 'count': unread_counts.get(user_id, 0)})
+        for user_id in user_ids
+    ]
+    try:
+        send_group_messages(messages)
+    except Exception as e:
+        # Reminders are already stored as notifications; a missed live push is not fatal
+        print(f"Error sending payment due reminders: {e}")
@@ -0,0 +1,118 @@
+"""
+Atomic payment posting against a loan's balance
+"""
+import uuid
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models.Loan import Loan
+from api.models.LoanStatusHistory import LoanStatusHistory
+from api.models.Payment import Payment
+from api.utils.loan_stats import record_loan_change
+
+PAYABLE_STATUSES = ('DISBURSED', 'ACTIVE')
+
+
+class PaymentRejected(Exception):
+    pass
+
+
+def post_payment(loan_id, amount, payment_method_id=None, payment_type='REGULAR'):
+    """
+    Record a completed payment and apply it to the loan
+
+    The loan row is locked and its remaining_balance, repayment_progress
+    and status are recomputed from the locked values by a single
+    UPDATE ... RETURNING, so concurrent payments on one loan queue up
+    instead of overwriting each other, and no other loan column is written.
+
+    Args:
+        loan_id: Id of the loan being paid
+        amount: Positive Decimal amount
+        payment_method_id: Optional PaymentMethod id
+        payment_type: REGULAR, EARLY or PAYOFF
+
+    Returns:
+        (payment, loan values after posting)
+
+    Raises:
+        Loan.DoesNotExist: If the loan does not exist
+        PaymentRejected: If the amount is not positive or the loan is not repayable
+    """
+    if amount <= 0:
+        raise PaymentRejected('Payment amount must be positive')
+
+    table = Loan._meta.db_table
+    sql = f"""
+        UPDATE {table} AS loan
+        SET remaining_balance = GREATEST(previous.remaining_balance - %(amount)s, 0),
+            repayment_progress = CASE
+                WHEN loan.total_amount > 0 THEN FLOOR(
+                    (loan.total_amount - GREATEST(previous.remaining_balance - %(amount)s, 0)) * 100 / loan.total_amount
+                )
+                ELSE loan.repayment_progress
+            END,
+            status = CASE WHEN previous.remaining_balance <= %(amount)s THEN 'CLOSED' ELSE previous.status END,
+            updated_at = %(now)s
+        FROM (
+            SELECT id, status, remaining_balance FROM {table}
+            WHERE id = %(loan_id)s AND status = ANY(%(payable)s)
+            FOR UPDATE
+        ) AS previous
+        WHERE loan.id = previous.id
+        RETURNING previous.status, previous.remaining_balance, loan.status, loan.remaining_balance,
+                  loan.repayment_progress, loan.borrower_id, loan.loan_type, loan.amount, loan.created_at
+    """
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {
+                'amount': amount,
+                'now': timezone.now(),
+                'loan_id': loan_id,
+                'payable': list(PAYABLE_STATUSES),
+            })
+            row = cursor.fetchone()
+        if row is None:
+            loan_status = Loan.objects.filter(pk=loan_id).values_list('status', flat=True).first()
+            if loan_status is None:
+                raise Loan.DoesNotExist(f'Loan {loan_id} does not exist')
+            raise PaymentRejected(f'Loan is {loan_status}; only disbursed or active loans accept payments')
+
+        (from_status, previous_balance, to_status, remaining_balance,
+         repayment_progress, borrower_id, loan_type, loan_amount, created_at) = row
+        shared = {'borrower_id': borrower_id, 'loan_type': loan_type, 'amount': loan_amount, 'created_at': created_at}
+        record_loan_change(
+            {**shared, 'status': from_status, 'remaining_balance': previous_balance},
+            {**shared, 'status': to_status, 'remaining_balance': remaining_balance},
+        )
+        if to_status != from_status:
+            LoanStatusHistory.objects.create(loan_id=loan_id, from_status=from_status, to_status=to_status)
+
+        payment = Payment.objects.create(
+            loan_id=loan_id,
+            customer_id=borrower_id,
+            payment_method_id=payment_method_id,
+            amount=amount,
+            payment_type=payment_type,
+            status='COMPLETED',
+            transaction_id=str(uuid.uuid4()),
+            processed_at=timezone.now(),
+        )
+
+    return payment, {
+        'status': to_status,
+        'remaining_balance': remaining_balance,
+        'repayment_progress': repayment_progress,
+    }
+
+
+def to_payment_amount(value):
+    """Parse a request amount into a two-place Decimal, or raise PaymentRejected"""
+    try:
+        amount = Decimal(str(value)).quantize(Decimal('0.01'))
+    except (ArithmeticError, ValueError, TypeError):
+        raise PaymentRejected('amount must be a decimal number')
+    return amount
@@ -0,0 +1,146 @@
+"""
+Payment to installment reconciliation
+
+Completed payments that have not been reconciled yet are allocated to
+their loan's open installments, oldest due first. Loans are processed in
+batches: the unreconciled payments and open installments of a batch are
+loaded with one query each, joined in memory on loan_id, and every change
+is written back with bulk_update / bulk_create.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.models.Payment import Payment
+from api.models.PaymentAllocation import PaymentAllocation
+from api.models.Repayment import Repayment
+from api.utils.dashboard_cache import schedule_dashboard_refresh
+from api.utils.dashboard_metrics import invalidate_repayment_month
+
+RECONCILE_BATCH_SIZE = 2000
+
+OPEN_REPAYMENT_STATUSES = Repayment.OPEN_STATUSES
+
+
+def unreconciled_payments(since=None):
+    """Completed payments not yet allocated, optionally processed on or after since"""
+    payments = Payment.objects.filter(status='COMPLETED', reconciled_at__isnull=True)
+    if since:
+        payments = payments.filter(created_at__date__gte=since)
+    return payments
+
+
+def reconcile_payments(since=None, batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Reconcile every unreconciled payment, batch_size loans at a time
+
+    Args:
+        since: Optional date; only payments created from this day are reconciled
+        batch_size: Number of loans loaded and written together
+
+    Returns:
+        Dictionary with the number of loans, payments, allocations and
+        settled installments processed
+    """
+    totals = defaultdict(int)
+    last_loan_id = 0
+    while True:
+        # Walk loans by id so each batch is one cheap index range read
+        loan_ids = list(
+            unreconciled_payments(since).filter(loan_id__gt=last_loan_id)
+            .order_by('loan_id').values_list('loan_id', flat=True).distinct()[:batch_size]
+        )
+        if not loan_ids:
+            break
+        for key, value in reconcile_loans(loan_ids, since).items():
+            totals[key] += value
+        last_loan_id = loan_ids[-1]
+    return dict(totals)
+
+
+def reconcile_loans(loan_ids, since=None):
+    """
+    Allocate the unreconciled payments of some loans to their open installments
+
+    Payments are applied in the order they were made; each fills the
+    oldest open installment first and spills over into the next. An
+    installment that becomes fully paid is ON_TIME when the settling
+    payment was made by its due date and LATE otherwise. A payment is
+    only marked reconciled once all of it is allocated; amount left over
+    when a loan has no open installment (or no schedule yet) keeps the
+    payment eligible for the next run.
+
+    Args:
+        loan_ids: Loans to reconcile
+        since: Same filter as reconcile_payments
+
+    Returns:
+        Counts of loans, payments, allocations and settled installments
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        payments_by_loan = defaultdict(list)
+        for payment in (
+            unreconciled_payments(since).filter(loan_id__in=loan_ids)
+            .select_for_update().order_by('loan_id', 'created_at', 'id')
+            .only('id', 'loan_id', 'amount', 'reconciled_amount', 'payment_date', 'processed_at', 'created_at')
+        ):
+            payments_by_loan[payment.loan_id].append(payment)
+
+        installments_by_loan = defaultdict(list)
+        for repayment in (
+            Repayment.objects.filter(loan_id__in=list(payments_by_loan), status__in=OPEN_REPAYMENT_STATUSES)
+            .select_for_update().order_by('loan_id', 'due_date', 'installment_number', 'id')
+            .only('id', 'loan_id', 'due_date', 'amount_due', 'amount_paid', 'status', 'payment_date')
+        ):
+            installments_by_loan[repayment.loan_id].append(repayment)
+
+        allocations = []
+        touched_repayments = {}
+        settled = 0
+        for loan_id, payments in payments_by_loan.items():
+            installments = installments_by_loan.get(loan_id, [])
+            position = 0
+            for payment in payments:
+                paid_on = payment.payment_date or timezone.localdate(payment.processed_at or payment.created_at)
+                available = payment.amount - payment.reconciled_amount
+                while available > 0 and position < len(installments):
+                    installment = installments[position]
+                    share = min(available, installment.amount_due - installment.amount_paid)
+                    if share > 0:
+                        installment.amount_paid += share
+                        payment.reconciled_amount += share
+                        available -= share
+                        allocations.append(PaymentAllocation(payment=payment, repayment=installment, amount=share))
+                        installment.updated_at = now
+                        touched_repayments[installment.pk] = installment
+                    if installment.amount_paid >= installment.amount_due:
+                        installment.status = 'ON_TIME' if paid_on <= installment.due_date else 'LATE'
+                        installment.payment_date = paid_on
+                        installment.updated_at = now
+                        touched_repayments[installment.pk] = installment
+                        settled += 1
+                        position += 1
+                if available == 0:
+                    payment.reconciled_at = now
+
+        payments = [payment for payments in payments_by_loan.values() for payment in payments]
+        Payment.objects.bulk_update(payments, ['reconciled_amount', 'reconciled_at'], batch_size=1000)
+        Repayment.objects.bulk_update(
+            list(touched_repayments.values()), ['amount_paid', 'status', 'payment_date', 'updated_at'], batch_size=1000
+        )
+        PaymentAllocation.objects.bulk_create(allocations, batch_size=1000)
+
+        if touched_repayments:
+            # bulk_update skips Repayment.save(), so drop the cached months here
+            for month in {repayment.due_date.replace(day=1) for repayment in touched_repayments.values()}:
+                invalidate_repayment_month(month)
+            schedule_dashboard_refresh()
+
+    return {
+        'loans': len(payments_by_loan),
+        'payments': len(payments),
+        'allocations': len(allocations),
+        'settled_installments': settled,
+    }
@@ -0,0 +1,121 @@
+"""
+Trigram search over pg_trgm GIN indexes
+
+Search fields use the DRF / admin syntax. A plain field path is matched
+with word similarity against lower(column), which the gin_trgm_ops
+expression indexes serve; a '=' prefixed path is an exact fast path
+(ids, account and ID numbers) served by its b-tree index.
+
+    search_fields = ['=id', 'borrower__first_name', 'borrower__last_name']
+"""
+import operator
+from functools import reduce
+
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.exceptions import ValidationError
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest, Lower
+
+# Exact identifier hits always rank above fuzzy name matches (similarity <= 1)
+EXACT_MATCH_RANK = 2.0
+
+
+def normalize_search_term(term):
+    """Lower-case a search term and collapse its whitespace"""
+    return ' '.join(term.lower().split())
+
+
+def split_search_fields(search_fields):
+    """Split DRF-style search fields into (exact paths, trigram paths)"""
+    exact, fuzzy = [], []
+    for field in search_fields:
+        if field.startswith('='):
+            exact.append(field[1:])
+        else:
+            fuzzy.append(field.lstrip('^@$'))
+    return exact, fuzzy
+
+
+def _resolve(model, path):
+    """Return (relation prefix, model owning the column, column) for a lookup path"""
+    parts = path.split('__')
+    for part in parts[:-1]:
+        model = model._meta.get_field(part).related_model
+    return '__'.join(parts[:-1]), model, parts[-1]
+
+
+def _exact_q(model, paths, term):
+    """OR of exact matches on the paths whose field accepts the term"""
+    q = Q()
+    for path in paths:
+        _, owner, column = _resolve(model, path)
+        try:
+            value = owner._meta.get_field(column).to_python(term)
+        except ValidationError:
+            continue
+        q |= Q(**{path: value})
+    return q
+
+
+def _fuzzy_q(model, paths, token):
+    """
+    Match one token against every trigram path
+
+    Columns are grouped per related table and matched inside a pk__in
+    subquery, so each table is probed through its own trigram index instead
+    of OR-ing conditions across a join, which Postgres cannot index.
+    """
+    groups = {}
+    for path in paths:
+        prefix, owner, column = _resolve(model, path)
+        groups.setdefault((prefix, owner), []).append(column)
+
+    q = Q()
+    for (prefix, owner), columns in groups.items():
+        match = reduce(operator.or_, (Q(TrigramWordSimilar(Lower(column), token)) for column in columns))
+        if prefix:
+            q |= Q(**{f'{prefix}__in': owner._default_manager.filter(match).values('pk')})
+        else:
+            q |= match
+    return q
+
+
+def trigram_search(queryset, term, search_fields):
+    """
+    Filter and rank a queryset by a free-text term
+
+    Every whitespace separated token has to match one of the trigram
+    fields; exact hits on the '=' fields are kept too and ranked first, so
+    a numeric term finds its id and partial account or phone numbers. Results are
+    ordered by search_rank, then by the queryset's own ordering.
+
+    Args:
+        queryset: Queryset to search
+        term: Raw search term from the request
+        search_fields: DRF-style field list, '=' marks exact fields
+
+    Returns:
+        Filtered queryset annotated with search_rank
+    """
+    raw_term = ' '.join(term.split())
+    term = normalize_search_term(term)
+    if not term:
+        return queryset
+
+    model = queryset.model
+    exact_paths, fuzzy_paths = split_search_fields(search_fields)
+    exact = _exact_q(model, exact_paths, raw_term)
+
+    if not fuzzy_paths:
+        return queryset.filter(exact) if exact else queryset.none()
+
+    fuzzy = reduce(operator.and_, (_fuzzy_q(model, fuzzy_paths, token) for token in term.split()))
+    similarities = [TrigramWordSimilarity(term, Lower(path)) for path in fuzzy_paths]
+    rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+    if exact:
+        rank = Case(When(exact, then=Value(EXACT_MATCH_RANK)), default=rank, output_field=FloatField())
+
+    return queryset.filter(exact | fuzzy).annotate(search_rank=rank).order_by(
+        '-search_rank', *queryset.query.order_by
+    )
@@ -0,0 +1,326 @@
+"""
+Streaming ingestion of bank statement files into loan payments
+
+Statements are CSV (with a header row) or NDJSON, one payment per line:
+
+    reference,amount,date,transaction_id
+    LOAN-1042,1500.00,2026-10-01,FNB-778812
+
+reference is a loan id prefixed LOAN- or the borrower's account number,
+which pays that borrower's oldest payable loan. A bare number is always
+taken as an account number.
+transaction_id is the bank's own reference; a line whose transaction_id
+was already posted is reported as a duplicate, so a statement can safely
+be uploaded twice. Posted references are looked up only once the target
+loans are locked, so a second upload of the same lines waits for the first
+to commit and then sees its payments. A unique constraint on
+Payment.transaction_reference backs this up: a chunk that loses a race to
+an upload paying the same bank reference into another loan is posted again
+and reports it as a duplicate.
+
+Lines are parsed one at a time and posted in chunks, so memory use depends
+on the chunk size, not on the file size.
+"""
+import csv
+import io
+import json
+import re
+import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from api.models.Loan import Loan
+from api.models.LoanStatusHistory import LoanStatusHistory
+from api.models.Payment import Payment
+from api.utils.dashboard_cache import schedule_dashboard_refresh
+from api.utils.loan_stats import TRACKED_FIELDS, record_loan_changes
+from api.utils.payments import PAYABLE_STATUSES
+
+STATEMENT_CHUNK_SIZE = 500
+
+# Attempts at a chunk that keeps losing bank reference races before its
+# lines are rejected
+CHUNK_ATTEMPTS = 3
+
+FORMATS = ('csv', 'ndjson')
+
+LOAN_REFERENCE = re.compile(r'^LOAN-(\d+)$', re.IGNORECASE)
+
+_amount_field = Payment._meta.get_field('amount')
+MAX_AMOUNT = Decimal(10) ** (_amount_field.max_digits - _amount_field.decimal_places) - Decimal('0.01')
+
+
+class StatementLine:
+    __slots__ = ('line', 'reference', 'amount', 'payment_date', 'bank_reference', 'error')
+
+    def __init__(self, line, reference=None, amount=None, payment_date=None, bank_reference=None, error=None):
+        self.line = line
+        self.reference = reference
+        self.amount = amount
+        self.payment_date = payment_date
+        self.bank_reference = bank_reference
+        self.error = error
+
+
+def statement_format(uploaded, requested=None):
+    """Pick the statement format from an explicit value or the file name"""
+    if requested:
+        return requested.lower() if requested.lower() in FORMATS else None
+    name = (uploaded.name or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def iter_statement_lines(stream, fmt):
+    """
+    Parse a binary statement stream lazily
+
+    Args:
+        stream: Binary file object
+        fmt: 'csv' or 'ndjson'
+
+    Yields:
+        StatementLine per data line; malformed lines carry an error
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield _parse_record(reader.line_num, record)
+        return
+
+    for number, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            yield StatementLine(number, error='Line is not valid JSON')
+            continue
+        if not isinstance(record, dict):
+            yield StatementLine(number, error='Line must be a JSON object')
+            continue
+        yield _parse_record(number, record)
+
+
+def ingest_statement(stream, fmt, chunk_size=STATEMENT_CHUNK_SIZE):
+    """
+    Post every line of a statement and report on each
+
+    Args:
+        stream: Binary file object
+        fmt: 'csv' or 'ndjson'
+        chunk_size: Lines posted per transaction
+
+    Yields:
+        One result dictionary per line, in file order, then
+        {'summary': {status: count}}
+    """
+    summary = {'posted': 0, 'duplicate': 0, 'rejected': 0, 'invalid': 0}
+    chunk = []
+
+    def flush():
+        for result in post_statement_chunk(chunk):
+            summary[result['status']] += 1
+            yield result
+        chunk.clear()
+
+    for entry in iter_statement_lines(stream, fmt):
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            yield from flush()
+    if chunk:
+        yield from flush()
+    yield {'summary': summary}
+
+
+def post_statement_chunk(entries):
+    """
+    Post one chunk of statement lines in a single transaction
+
+    A chunk that trips the unique constraint on
+    Payment.transaction_reference is rolled back and posted again; by then
+    the upload it raced has committed, so its lines come back as duplicates.
+    Lines of a chunk that keeps failing are rejected rather than breaking
+    off the stream.
+
+    Args:
+        entries: List of StatementLine
+
+    Returns:
+        List of result dictionaries, in the order of entries
+    """
+    for _ in range(CHUNK_ATTEMPTS):
+        try:
+            return _post_chunk(entries)
+        except IntegrityError:
+            continue
+    return [
+        {'line': entry.line, 'status': 'invalid', 'error': entry.error} if entry.error else
+        {'line': entry.line, 'status': 'rejected', 'error': 'Line could not be posted, upload it again'}
+        for entry in entries
+    ]
+
+
+def _post_chunk(entries):
+    """
+    Post one chunk of statement lines
+
+    References are resolved with one query. The target loans are locked
+    before the already-posted bank references are looked up, so a concurrent
+    upload of the same lines has committed by then. Every line is applied in
+    file order in memory, and the chunk is written with one bulk INSERT of
+    payments, one bulk UPDATE of loans, the netted rollup deltas and one
+    bulk INSERT of status history for loans that were paid off.
+
+    Args:
+        entries: List of StatementLine
+
+    Returns:
+        List of result dictionaries, in the order of entries
+    """
+    valid = [entry for entry in entries if entry.error is None]
+    loan_ids = _resolve_references({entry.reference for entry in valid})
+    bank_references = {entry.bank_reference for entry in valid if entry.bank_reference}
+
+    results = []
+    with transaction.atomic():
+        loans = {
+            row['id']: row
+            for row in Loan.objects.select_for_update().filter(pk__in=set(loan_ids.values())).order_by('pk').values(
+                'id', 'total_amount', 'repayment_progress', *TRACKED_FIELDS
+            )
+        }
+        posted_references = set(
+            Payment.objects.filter(transaction_reference__in=bank_references)
+            .values_list('transaction_reference', flat=True)
+        ) if bank_references else set()
+        previous = {loan_id: dict(row) for loan_id, row in loans.items()}
+        payments = []
+        now = timezone.now()
+
+        for entry in entries:
+            result = {'line': entry.line}
+            loan_id = loan_ids.get(entry.reference)
+            loan = loans.get(loan_id)
+            if entry.error:
+                result.update(status='invalid', error=entry.error)
+            elif entry.bank_reference and entry.bank_reference in posted_references:
+                result.update(status='duplicate', error=f'{entry.bank_reference} was already posted')
+            elif loan is None:
+                result.update(status='rejected', error=f'No loan matches reference {entry.reference}')
+            elif loan['status'] not in PAYABLE_STATUSES:
+                result.update(status='rejected', loan_id=loan_id, error=f"Loan is {loan['status']}")
+            else:
+                _apply_payment(loan, entry.amount)
+                payments.append(Payment(
+                    loan_id=loan_id,
+                    customer_id=loan['borrower_id'],
+                    amount=entry.amount,
+                    payment_type='REGULAR',
+                    status='COMPLETED',
+                    transaction_id=str(uuid.uuid4()),
+                    transaction_reference=entry.bank_reference,
+                    payment_date=entry.payment_date,
+                    processed_at=now,
+                ))
+                if entry.bank_reference:
+                    posted_references.add(entry.bank_reference)
+                result.update(status='posted', loan_id=loan_id, payment=len(payments) - 1)
+            results.append(result)
+
+        if payments:
+            payments = Payment.objects.bulk_create(payments, batch_size=1000)
+            changed = [loan for loan_id, loan in loans.items() if loan != previous[loan_id]]
+            Loan.objects.bulk_update(
+                [
+                    Loan(
+                        pk=loan['id'],
+                        remaining_balance=loan['remaining_balance'],
+                        repayment_progress=loan['repayment_progress'],
+                        status=loan['status'],
+                        updated_at=now,
+                    )
+                    for loan in changed
+                ],
+                ['remaining_balance', 'repayment_progress', 'status', 'updated_at'],
+                batch_size=1000
+            )
+            record_loan_changes((previous[loan['id']], loan) for loan in changed)
+            LoanStatusHistory.objects.bulk_create([
+                LoanStatusHistory(loan_id=loan['id'], from_status=previous[loan['id']]['status'], to_status=loan['status'])
+                for loan in changed
+                if loan['status'] != previous[loan['id']]['status']
+            ])
+            schedule_dashboard_refresh()
+
+    for result in results:
+        if 'payment' in result:
+            result['payment_id'] = payments[result.pop('payment')].pk
+    return results
+
+
+def _apply_payment(loan, amount):
+    """Apply a payment to a locked loan's values the way post_payment does in SQL"""
+    previous_balance = loan['remaining_balance']
+    balance = max(previous_balance - amount, Decimal('0.00'))
+    loan['remaining_balance'] = balance
+    if loan['total_amount'] > 0:
+        loan['repayment_progress'] = int((loan['total_amount'] - balance) * 100 / loan['total_amount'])
+    if previous_balance <= amount:
+        loan['status'] = 'CLOSED'
+
+
+def _resolve_references(references):
+    """Map statement references to loan ids: loan ids first, then account numbers"""
+    resolved = {}
+    accounts = set()
+    for reference in references:
+        match = LOAN_REFERENCE.match(reference)
+        if match:
+            resolved[reference] = int(match.group(1))
+        else:
+            accounts.add(reference)
+
+    if accounts:
+        newest_first = Loan.objects.filter(
+            borrower__account__account_number__in=accounts,
+            status__in=PAYABLE_STATUSES,
+        ).order_by('-created_at', '-pk').values_list('borrower__account__account_number', 'pk')
+        # Later (older) rows overwrite newer ones, leaving each account's oldest loan
+        resolved.update(dict(newest_first))
+    return resolved
+
+
+def _parse_record(line, record):
+    record = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+    reference = str(record.get('reference') or '').strip()
+    if not reference:
+        return StatementLine(line, error='reference is required')
+
+    try:
+        amount = Decimal(str(record.get('amount', '')).strip().replace(',', '')).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return StatementLine(line, reference=reference, error='amount must be a decimal number')
+    if not amount.is_finite():
+        return StatementLine(line, reference=reference, error='amount must be a decimal number')
+    if amount <= 0:
+        return StatementLine(line, reference=reference, error='amount must be positive')
+    if amount > MAX_AMOUNT:
+        return StatementLine(line, reference=reference, error=f'amount must be at most {MAX_AMOUNT}')
+
+    payment_date = None
+    if record.get('date'):
+        try:
+            payment_date = date.fromisoformat(str(record['date']).strip())
+        except ValueError:
+            return StatementLine(line, reference=reference, error='date must be YYYY-MM-DD')
+
+    bank_reference = str(record.get('transaction_id') or '').strip() or None
+    return StatementLine(line, reference, amount, payment_date, bank_reference)
@@ -1,6 +1,8 @@
 """
 Utility functions for sending WebSocket events from anywhere in the application
 """
+import asyncio
+
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
@@ -161,7 +163,15 @@ def send_payment_due_reminder(user_id, loan_id, due_date, amount):
         amount: Amount due
     """
     channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
+    async_to_sync(channel_layer.group_send)(*payment_due_reminder_message(user_id, loan_id, due_date, amount))
+
+
+def payment_due_reminder_message(user_id, loan_id, due_date, amount):
+    """
+    Build the (group name, message) pair sent by send_payment_due_reminder,
+    for batching many reminders through send_group_messages
+    """
+    return (
         f'loan_updates_{user_id}',
         {
             'type': 'payment_due_reminder',
@@ -171,6 +181,45 @@ def send_payment_due_reminder(user_id, loan_id, due_date, amount):
         }
     )
 
+def send_group_messages(messages):
+    """
+    Send many channel layer messages in one batch
+
+    All group_send calls run concurrently on a single event loop hop instead
+    of one blocking async_to_sync round trip per message.
+
+    Args:
+        messages: Iterable of (group name, message dict) pairs
+    """
+    messages = list(messages)
+    if not messages:
+        return
+    channel_layer = get_channel_layer()
+
+    async def send_all():
+        await asyncio.gather(*(channel_layer.group_send(group, message) for group, message in messages))
+
+    async_to_sync(send_all)()
+
+
+def send_dashboard_changed():
+    """
+    Tell every live dashboard connection that loans, payments or repayments
+    changed. Consumers coalesce these and push the resulting deltas.
+    """
+    channel_layer = get_channel_layer()
+    try:
+        async_to_sync(channel_layer.group_send)(
+            'dashboard',
+            {
+                'type': 'dashboard_changed',
+            }
+        )
+    except Exception as e:
+        # Live dashboards are best effort; never fail the write that triggered this
+        print(f"Error notifying dashboards: {e}")
+
+
 def trigger_loan_status_change(loan, status, message=''):
     """
     Trigger loan status change and send notifications
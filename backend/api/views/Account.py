@@ -1,14 +1,15 @@
-from rest_framework import viewsets, status
+from rest_framework import filters, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
 from ..models.Account import Account
+from ..search import TrigramSearchFilter
 from ..serializers.Account import AccountSerializer
 
 class AccountViewSet(viewsets.ModelViewSet):
     queryset = Account.objects.all().order_by('-created_at')
     serializer_class = AccountSerializer
-    search_fields = ['user__username', 'user__email', 'account_number']
+    filter_backends = [TrigramSearchFilter, filters.OrderingFilter]
+    search_fields = ['=id', '=account_number', 'account_number', 'user__username', 'user__email']
     ordering_fields = ['created_at', 'user__username']
     filterset_fields = ['status', 'kyc_status', 'account_type']
 
@@ -33,15 +34,6 @@ class AccountViewSet(viewsets.ModelViewSet):
         if account_type:
             queryset = queryset.filter(account_type=account_type)
         
-        # Search
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(user__username__icontains=search) |
-                Q(user__email__icontains=search) |
-                Q(account_number__icontains=search)
-            )
-        
         return queryset
 
     @action(detail=True, methods=['post'])
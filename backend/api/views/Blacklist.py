@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from django.utils import timezone
+from api.pagination import KeysetPagination
 from api.models import Blacklist, CreditBureauCheck, DocumentVerification, AuditLog, BiometricData
 from api.serializers.Blacklist import (
     BlacklistSerializer, CreditBureauCheckSerializer,
@@ -206,6 +207,7 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = AuditLog.objects.select_related('user').all()
     serializer_class = AuditLogSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['action_type', 'user', 'success', 'device_type']
@@ -1,17 +1,21 @@
-from rest_framework import viewsets, status
+from rest_framework import filters, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count
 from datetime import datetime, timedelta
 from django.utils import timezone
+from ..models.Account import Account
 from ..models.Customer import Customer
 from ..models.Loan import Loan
+from ..search import TrigramSearchFilter
 from ..serializers.Customer import CustomerSerializer
 
 class CustomerViewSet(viewsets.ModelViewSet):
-    queryset = Customer.objects.all().order_by('-created_at')
+    queryset = Customer.objects.select_related('account__user').order_by('-created_at')
     serializer_class = CustomerSerializer
-    search_fields = ['first_name', 'last_name', 'account__user__email']
+    query_budgets = {'list': 2, 'retrieve': 1}
+    filter_backends = [TrigramSearchFilter, filters.OrderingFilter]
+    search_fields = ['=id', '=sa_id_number', 'first_name', 'last_name', 'account__user__email']
     ordering_fields = ['created_at', 'first_name', 'last_name']
 
     def get_queryset(self):
@@ -20,15 +24,6 @@ class CustomerViewSet(viewsets.ModelViewSet):
         """
         queryset = super().get_queryset()
         
-        # Search by name, email, or phone
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(account__user__email__icontains=search)
-            )
-        
         # Filter by account status
         account_status = self.request.query_params.get('account_status', None)
         if account_status:
@@ -1,14 +1,17 @@
-from django.db.models import Sum, Count, Q, Avg
+from django.db.models import Sum, Q, Avg
 from django.db.models.functions import TruncMonth, TruncDay
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from datetime import datetime, timedelta
-from decimal import Decimal
+import csv
+from datetime import date, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
 from ..models.Customer import Customer
 from ..models.Loan import Loan
+from ..models.LoanDailyStats import LoanDailyStats
 from ..models.Account import Account
 from ..models.Appointment import Appointment
 
@@ -17,85 +20,62 @@ from ..serializers.Loan import LoanSerializer
 from ..serializers.Account import AccountSerializer
 from ..serializers.Appointment import AppointmentSerializer
 
+from ..utils.dashboard_cache import cached_panel, panel_cache_stats
+from ..utils import keyset
+from ..utils.cohorts import cohort_matrix
+from ..utils.portfolio_at_risk import aging_csv_rows, par_report, parse_as_of
+from ..utils.dashboard_metrics import (
+    ACTIVITY_FIELDS, approval_histogram, dashboard_stats, loan_activity_item,
+    loan_status_breakdown, repayment_performance
+)
+
 
 class DashboardViewSet(viewsets.ViewSet):
     """
     ViewSet for dashboard statistics and analytics
     """
+    MAX_APPROVAL_RATE_DAYS = 31
+    MAX_REPAYMENT_MONTHS = 36
+    MAX_ACTIVITY_FEED_LIMIT = 100
+    query_budgets = {
+        'stats': 2,
+        'loan_disbursement': 1,
+        'loan_status_breakdown': 1,
+        'repayments_performance': 1,
+        'approval_rate': 1,
+        'recent_notifications': 1,
+        'activity_feed': 1,
+        'portfolio_at_risk': 1,
+        'portfolio_at_risk_export': 1,
+        'cohorts': 1,
+        'cache_stats': 0,
+    }
     
     @action(detail=False, methods=['get'])
+    @cached_panel('stats')
     def stats(self, request):
         """
         Get overall dashboard statistics
         """
-        today = timezone.now().date()
-        week_ago = today - timedelta(days=7)
-        
-        # Budget calculation
-        budget = Decimal('1240000.00')  # This could be from settings
-        
-        # Today's stats
-        today_loan_requests = Loan.objects.filter(created_at__date=today).count()
-        today_approvals = Loan.objects.filter(
-            status='APPROVED',
-            updated_at__date=today
-        ).count()
-        today_declines = Loan.objects.filter(
-            status='REJECTED',
-            updated_at__date=today
-        ).count()
-        
-        # Total loans
-        total_loans_amount = Loan.objects.filter(
-            status__in=['APPROVED', 'DISBURSED']
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        total_loans_count = Loan.objects.count()
-        
-        # Remaining loans (active loans)
-        remaining_loans_amount = Loan.objects.filter(
-            status='DISBURSED'
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        # Last week stats for comparison
-        last_week_total = Loan.objects.filter(
-            created_at__date__gte=week_ago,
-            created_at__date__lt=today
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        # Calculate percentage change
-        if last_week_total > 0:
-            percentage_change = float((total_loans_amount - last_week_total) / last_week_total * 100)
-        else:
-            percentage_change = 10.01
-        
-        return Response({
-            'budget': str(budget),
-            'today_loan_requests': today_loan_requests,
-            'today_approvals': today_approvals,
-            'today_declines': today_declines,
-            'total_loans_amount': str(total_loans_amount),
-            'total_loans_count': total_loans_count,
-            'remaining_loans_amount': str(remaining_loans_amount),
-            'percentage_change': round(percentage_change, 2)
-        })
+        return Response(dashboard_stats())
     
     @action(detail=False, methods=['get'])
+    @cached_panel('loan_disbursement')
     def loan_disbursement(self, request):
         """
         Get loan disbursement data by month for charts
         """
         # Get loans from the last 12 months
-        twelve_months_ago = timezone.now() - timedelta(days=365)
+        twelve_months_ago = timezone.localdate() - timedelta(days=365)
         
-        loans_by_month = Loan.objects.filter(
-            created_at__gte=twelve_months_ago,
+        loans_by_month = LoanDailyStats.objects.filter(
+            day__gte=twelve_months_ago,
             status__in=['APPROVED', 'DISBURSED']
         ).annotate(
-            month=TruncMonth('created_at')
+            month=TruncMonth('day')
         ).values('month').annotate(
-            total_amount=Sum('amount'),
-            count=Count('id')
+            total_amount=Sum('amount_total'),
+            count=Sum('loan_count')
         ).order_by('month')
         
         data = []
@@ -109,100 +89,208 @@ class DashboardViewSet(viewsets.ViewSet):
         return Response(data)
     
     @action(detail=False, methods=['get'])
+    @cached_panel('loan_status_breakdown')
     def loan_status_breakdown(self, request):
         """
         Get loan status breakdown for pie chart
         """
-        total_count = Loan.objects.count()
-        
-        if total_count == 0:
-            return Response({
-                'approved': 0,
-                'pending': 0,
-                'declined': 0
-            })
-        
-        approved_count = Loan.objects.filter(status='APPROVED').count()
-        pending_count = Loan.objects.filter(status='PENDING').count()
-        declined_count = Loan.objects.filter(status='REJECTED').count()
-        
-        return Response({
-            'approved': round((approved_count / total_count) * 100, 1),
-            'pending': round((pending_count / total_count) * 100, 1),
-            'declined': round((declined_count / total_count) * 100, 1),
-            'approved_count': approved_count,
-            'pending_count': pending_count,
-            'declined_count': declined_count,
-            'total_count': total_count
-        })
+        return Response(loan_status_breakdown())
     
     @action(detail=False, methods=['get'])
+    @cached_panel('repayments_performance')
     def repayments_performance(self, request):
         """
-        Get repayments performance data by month
-        Mock data for now - would need a Repayment model in production
+        Get repayments performance (on time / late / missed) by due month
+        
+        Query params:
+            months: Number of months ending with the current one (default 12)
         """
-        import random
-        months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct']
-        data = []
+        try:
+            months = int(request.query_params.get('months', 12))
+        except ValueError:
+            return Response(
+                {'error': 'months must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        for month in months:
-            data.append({
-                'month': month,
-                'on_time': random.randint(3, 11),
-                'late': random.randint(1, 4),
-                'missed': random.randint(0, 2)
-            })
+        if not 1 <= months <= self.MAX_REPAYMENT_MONTHS:
+            return Response(
+                {'error': f'months must be between 1 and {self.MAX_REPAYMENT_MONTHS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        data = repayment_performance(months)
         return Response(data)
     
     @action(detail=False, methods=['get'])
+    @cached_panel('approval_rate')
     def approval_rate(self, request):
         """
-        Get today's approval rate by hour
-        """
-        today = timezone.now().date()
-        
-        # Get hourly approvals for today
-        hourly_data = []
-        for hour in range(8, 16):  # 8 AM to 3 PM
-            hour_start = timezone.make_aware(datetime.combine(today, datetime.min.time().replace(hour=hour)))
-            hour_end = hour_start + timedelta(hours=1)
-            
-            approvals = Loan.objects.filter(
-                status='APPROVED',
-                updated_at__gte=hour_start,
-                updated_at__lt=hour_end
-            ).count()
-            
-            hourly_data.append({
-                'time': f"{hour:02d}:00",
-                'approvals': approvals
-            })
+        Get loan approvals by hour
+        
+        Query params:
+            date: Single local day (YYYY-MM-DD), defaults to today
+            start_date / end_date: Range of local days instead of a single day
+            start_hour / end_hour: Hour window of each day, end exclusive (default 8-16)
+            tz: IANA timezone the days and hours are expressed in (default server timezone)
+        """
+        tz_name = request.query_params.get('tz')
+        try:
+            tz = ZoneInfo(tz_name) if tz_name else timezone.get_current_timezone()
+        except (ZoneInfoNotFoundError, ValueError):
+            return Response(
+                {'error': f'Unknown timezone: {tz_name}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        today = timezone.localdate(timezone=tz)
+        try:
+            single_date = request.query_params.get('date')
+            start_date = date.fromisoformat(request.query_params.get('start_date') or single_date or today.isoformat())
+            end_date = date.fromisoformat(request.query_params.get('end_date') or single_date or start_date.isoformat())
+            start_hour = int(request.query_params.get('start_hour', 8))
+            end_hour = int(request.query_params.get('end_hour', 16))
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be YYYY-MM-DD and hours must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        if not 0 <= start_hour < end_hour <= 24:
+            return Response(
+                {'error': 'Hours must satisfy 0 <= start_hour < end_hour <= 24'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= (end_date - start_date).days < self.MAX_APPROVAL_RATE_DAYS:
+            return Response(
+                {'error': f'Date range must span 1 to {self.MAX_APPROVAL_RATE_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        hourly_data = approval_histogram(start_date, end_date, start_hour, end_hour, tz)
         return Response(hourly_data)
     
     @action(detail=False, methods=['get'])
+    @cached_panel('recent_notifications', bucket='hour')
     def recent_notifications(self, request):
         """
         Get recent notifications
         """
         # Get recent loan requests and applications
-        recent_loans = Loan.objects.filter(
+        recent_loans = Loan.objects.select_related('borrower').only(
+            *ACTIVITY_FIELDS
+        ).filter(
             created_at__gte=timezone.now() - timedelta(days=1)
-        ).order_by('-created_at')[:10]
-        
-        notifications = []
-        for loan in recent_loans:
-            notifications.append({
-                'id': loan.id,
-                'type': 'NEW_LOAN_REQUEST' if loan.status == 'PENDING' else 'LOAN_STATUS_UPDATE',
-                'title': 'New Loan Request' if loan.status == 'PENDING' else 'Loan Status Updated',
-                'message': f"New loan request from {loan.borrower.first_name} {loan.borrower.last_name} (R {loan.amount}). Awaiting review.",
-                'time': loan.created_at.strftime('%H:%M'),
-                'customer_name': f"{loan.borrower.first_name} {loan.borrower.last_name}",
-                'amount': str(loan.amount),
-                'created_at': loan.created_at.isoformat()
-            })
+        ).order_by('-created_at', '-id')[:10]
         
+        notifications = [loan_activity_item(loan) for loan in recent_loans]
         return Response(notifications)
+    
+    @action(detail=False, methods=['get'])
+    @cached_panel('activity_feed', bucket='hour')
+    def activity_feed(self, request):
+        """
+        Get the loan activity feed, newest first, one joined query per page
+        
+        Query params:
+            limit: Page size (default 20, max 100)
+            cursor: next_cursor of the previous page, to fetch older items
+            since: since_cursor of an earlier response (or an ISO datetime), to fetch only newer items
+        """
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, self.MAX_ACTIVITY_FEED_LIMIT))
+        
+        loans = Loan.objects.select_related('borrower').only(*ACTIVITY_FIELDS)
+        try:
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                loans = loans.filter(keyset.before(keyset.decode_cursor(cursor)))
+            since = request.query_params.get('since')
+            if since:
+                loans = loans.filter(keyset.after(keyset.parse_since(since)))
+        except keyset.InvalidCursor:
+            return Response(
+                {'error': 'Invalid cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Fetch one extra row to know whether an older page exists
+        page = list(loans.order_by('-created_at', '-id')[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        
+        return Response({
+            'results': [loan_activity_item(loan) for loan in page],
+            'next_cursor': keyset.encode_cursor(page[-1].created_at, page[-1].id) if has_more else None,
+            'since_cursor': keyset.encode_cursor(page[0].created_at, page[0].id) if page else since,
+        })
+    
+    @action(detail=False, methods=['get'])
+    @cached_panel('portfolio_at_risk')
+    def portfolio_at_risk(self, request):
+        """
+        Get PAR 30/60/90 and arrears aging buckets of the repayable book
+        
+        Query params:
+            as_of: Reference date (YYYY-MM-DD), defaults to today
+        """
+        try:
+            as_of = parse_as_of(request.query_params.get('as_of'))
+        except ValueError:
+            return Response(
+                {'error': 'as_of must be a date in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(par_report(as_of))
+    
+    @action(detail=False, methods=['get'])
+    def portfolio_at_risk_export(self, request):
+        """
+        Download the arrears aging of every loan as CSV
+        
+        Query params:
+            as_of: Reference date (YYYY-MM-DD), defaults to today
+        """
+        try:
+            as_of = parse_as_of(request.query_params.get('as_of'))
+        except ValueError:
+            return Response(
+                {'error': 'as_of must be a date in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        buffer = _EchoBuffer()
+        writer = csv.writer(buffer)
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in aging_csv_rows(as_of)),
+            content_type='text/csv'
+        )
+        response['Content-Disposition'] = f'attachment; filename="portfolio-at-risk-{as_of.isoformat()}.csv"'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def cohorts(self, request):
+        """
+        Get the vintage curves of every origination month: cumulative repaid
+        and defaulted by month on book, read from the materialized cohort table
+        """
+        return Response(cohort_matrix())
+    
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """
+        Get hit/miss counters of the dashboard panel cache
+        """
+        return Response(panel_cache_stats())
+
+
+class _EchoBuffer:
+    """File-like object whose write() returns the line, for streaming csv.writer output"""
+    def write(self, value):
+        return value
@@ -7,6 +7,7 @@ from rest_framework import filters
 from django.utils import timezone
 from api.models import EwalletPayment, Loan
 from api.serializers.EwalletPayment import EwalletPaymentSerializer
+from api.utils.idempotency import idempotent
 
 
 class EwalletPaymentViewSet(viewsets.ModelViewSet):
@@ -20,6 +21,7 @@ class EwalletPaymentViewSet(viewsets.ModelViewSet):
     ordering = ['-initiated_at']
     
     @action(detail=False, methods=['post'])
+    @idempotent('ewallet_initiate_payment')
     def initiate_payment(self, request):
         """
         Initiate a new ewallet payment for loan disbursement
@@ -1,15 +1,28 @@
-from rest_framework import viewsets, status
+from rest_framework import filters, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
 from datetime import datetime
+from django.db import transaction
+from ..models.Account import Account
 from ..models.Loan import Loan
-from ..serializers.Loan import LoanSerializer, LoanDetailSerializer
+from ..models.LoanDailyStats import LoanDailyStats
+from ..models.LoanStatusHistory import LoanStatusHistory
+from ..pagination import KeysetPagination
+from ..search import TrigramSearchFilter
+from ..serializers.Loan import LoanSerializer, LoanDetailSerializer, loan_list_rows, serialize_loan_rows
+from ..utils.amortization import materialize_schedules
+from ..utils.dashboard_cache import bump_dashboard_version
+from ..utils.idempotency import idempotent
+from ..utils.loan_history import parse_timestamp, portfolio_as_of, transition_counts
+from ..utils.loan_transitions import ALLOWED_TRANSITIONS, MAX_BULK_TRANSITION, bulk_transition
 
 class LoanViewSet(viewsets.ModelViewSet):
-    queryset = Loan.objects.all().order_by('-created_at')
+    queryset = Loan.objects.select_related('borrower__account__user').order_by('-created_at')
     serializer_class = LoanSerializer
-    search_fields = ['borrower__first_name', 'borrower__last_name', 'status', 'loan_type']
+    pagination_class = KeysetPagination
+    query_budgets = {'list': 2, 'retrieve': 2, 'today_loans': 1, 'status_as_of': 1, 'transitions': 1, 'status_history': 1}
+    filter_backends = [TrigramSearchFilter, filters.OrderingFilter]
+    search_fields = ['=id', 'borrower__first_name', 'borrower__last_name']
     ordering_fields = ['created_at', 'amount', 'start_date', 'end_date']
     filterset_fields = ['status', 'loan_type']
 
@@ -47,17 +60,24 @@ class LoanViewSet(viewsets.ModelViewSet):
         if max_amount:
             queryset = queryset.filter(amount__lte=max_amount)
         
-        # Search by customer name or loan ID
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(borrower__first_name__icontains=search) |
-                Q(borrower__last_name__icontains=search) |
-                Q(id__icontains=search)
-            )
-        
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """
+        List loans from a single values() query
+
+        Pass mode=full to render through LoanSerializer instead; both produce
+        the same payload.
+        """
+        if request.query_params.get('mode') == 'full':
+            return super().list(request, *args, **kwargs)
+
+        rows = loan_list_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_loan_rows(page))
+        return Response(serialize_loan_rows(rows))
+
     @action(detail=False, methods=['get'])
     def today_loans(self, request):
         """
@@ -65,8 +85,69 @@ class LoanViewSet(viewsets.ModelViewSet):
         """
         today = datetime.now().date()
         loans = self.get_queryset().filter(created_at__date=today)
-        serializer = self.get_serializer(loans, many=True)
-        return Response(serializer.data)
+        return Response(serialize_loan_rows(loan_list_rows(loans)))
+    
+    @action(detail=False, methods=['get'])
+    def status_as_of(self, request):
+        """
+        Reconstruct the loan book as of a timestamp from the status history
+        
+        Query params:
+            at: ISO date or datetime (required)
+            loan_type: Optional loan type
+        """
+        try:
+            at = parse_timestamp(request.query_params.get('at', ''))
+        except ValueError:
+            return Response(
+                {'error': 'at must be an ISO date or datetime'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        statuses = portfolio_as_of(at, loan_type=request.query_params.get('loan_type'))
+        return Response({
+            'at': at.isoformat(),
+            'statuses': [{**row, 'amount': str(row['amount'])} for row in statuses],
+            'total_loans': sum(row['loans'] for row in statuses),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def transitions(self, request):
+        """
+        Count status transitions in a time window
+        
+        Query params:
+            start: ISO date or datetime, inclusive (required)
+            end: ISO date or datetime, exclusive (required)
+            to_status: Optional status to count transitions into
+        """
+        try:
+            start = parse_timestamp(request.query_params.get('start', ''))
+            end = parse_timestamp(request.query_params.get('end', ''))
+        except ValueError:
+            return Response(
+                {'error': 'start and end must be ISO dates or datetimes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        counts = transition_counts(start, end, to_status=request.query_params.get('to_status'))
+        return Response({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'transitions': [
+                {'from_status': from_status, 'to_status': to_status, 'count': count}
+                for (from_status, to_status), count in sorted(counts.items(), key=lambda item: -item[1])
+            ],
+            'total': sum(counts.values()),
+        })
+    
+    @action(detail=True, methods=['get'])
+    def status_history(self, request, pk=None):
+        """
+        Get a loan's status transitions, oldest first
+        """
+        history = LoanStatusHistory.objects.filter(loan_id=pk).order_by('changed_at', 'id')
+        return Response(list(history.values('from_status', 'to_status', 'changed_at')))
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -93,7 +174,7 @@ class LoanViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def disburse(self, request, pk=None):
         """
-        Disburse an approved loan
+        Disburse an approved loan and materialize its repayment schedule
         """
         loan = self.get_object()
         if loan.status != 'APPROVED':
@@ -101,17 +182,57 @@ class LoanViewSet(viewsets.ModelViewSet):
                 {'error': 'Only approved loans can be disbursed'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        loan.status = 'DISBURSED'
-        loan.save()
+        with transaction.atomic():
+            loan.status = 'DISBURSED'
+            materialize_schedules([loan])
+            if not loan.remaining_balance:
+                loan.remaining_balance = loan.total_amount
+            loan.save()
         serializer = self.get_serializer(loan)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def bulk_transition(self, request):
+        """
+        Move many loans to a new status at once
+
+        Loans that are not in a status the target can be reached from are
+        skipped and reported with their current status.
+        """
+        target = request.data.get('status')
+        loan_ids = request.data.get('loan_ids')
+        if target not in ALLOWED_TRANSITIONS:
+            return Response(
+                {'error': f"status must be one of {', '.join(ALLOWED_TRANSITIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(loan_ids, list) or not loan_ids or len(loan_ids) > MAX_BULK_TRANSITION:
+            return Response(
+                {'error': f'loan_ids must be a list of 1 to {MAX_BULK_TRANSITION} loan ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            loan_ids = [int(loan_id) for loan_id in loan_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'loan_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated, skipped = bulk_transition(loan_ids, target, request.data.get('message', ''))
+        return Response({
+            'status': target,
+            'updated': updated,
+            'skipped': [{'id': loan_id, 'status': current} for loan_id, current in skipped.items()],
+            'not_found': sorted(set(loan_ids) - set(updated) - set(skipped)),
+        })
+
     @action(detail=False, methods=['delete'])
     def delete_all(self, request):
         """
         Delete all loans (for testing)
         """
         Loan.objects.all().delete()
+        LoanDailyStats.objects.all().delete()
+        Account.objects.update(total_loans=0, loan_amount=0)
+        bump_dashboard_version()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def retrieve(self, request, *args, **kwargs):
@@ -121,6 +242,7 @@ class LoanViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
+    @idempotent('loan_payoff')
     def payoff(self, request, pk=None):
         """Pay off the entire loan"""
         loan = self.get_object()
@@ -3,11 +3,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from ..models.Notification import Notification
+from ..pagination import KeysetPagination
 from ..serializers.Notification import NotificationSerializer
 
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all().order_by('-created_at')
     serializer_class = NotificationSerializer
+    pagination_class = KeysetPagination
     filterset_fields = ['user', 'type', 'is_read']
     
     @action(detail=False, methods=['get'])
@@ -1,58 +1,36 @@
+import json
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from django.utils import timezone
-from decimal import Decimal
-import uuid
 from ..models.Payment import Payment
 from ..models.Loan import Loan
+from ..pagination import KeysetPagination
 from ..serializers.Payment import PaymentSerializer
+from ..utils.idempotency import idempotent
+from ..utils.payments import post_payment, to_payment_amount
+from ..utils.statement_ingest import ingest_statement, statement_format
 
 class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all().order_by('-created_at')
     serializer_class = PaymentSerializer
+    pagination_class = KeysetPagination
     filterset_fields = ['loan', 'customer', 'status', 'payment_type']
     
     @action(detail=False, methods=['post'])
+    @idempotent('process_payment')
     def process_payment(self, request):
         """Process a loan payment"""
         loan_id = request.data.get('loan_id')
-        amount = request.data.get('amount')
         payment_method_id = request.data.get('payment_method_id')
         payment_type = request.data.get('payment_type', 'REGULAR')
         
         try:
-            loan = Loan.objects.get(id=loan_id)
-            
-            # Create payment record
-            payment = Payment.objects.create(
-                loan=loan,
-                customer=loan.borrower,
-                payment_method_id=payment_method_id,
-                amount=Decimal(amount),
-                payment_type=payment_type,
-                status='PROCESSING',
-                transaction_id=str(uuid.uuid4())
-            )
-            
+            amount = to_payment_amount(request.data.get('amount'))
             # Simulate payment processing
             # In production, integrate with payment gateway
-            payment.status = 'COMPLETED'
-            payment.processed_at = timezone.now()
-            payment.save()
-            
-            # Update loan balance
-            loan.remaining_balance -= Decimal(amount)
-            if loan.remaining_balance <= 0:
-                loan.remaining_balance = Decimal('0.00')
-                loan.status = 'CLOSED'
-            
-            # Update repayment progress
-            if loan.total_amount > 0:
-                paid_amount = loan.total_amount - loan.remaining_balance
-                loan.repayment_progress = int((paid_amount / loan.total_amount) * 100)
-            
-            loan.save()
+            payment, _ = post_payment(loan_id, amount, payment_method_id, payment_type)
             
             serializer = self.get_serializer(payment)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -68,6 +46,27 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def ingest_statement(self, request):
+        """
+        Post every line of an uploaded CSV or NDJSON bank statement
+
+        Streams back one NDJSON result per line, then a summary line.
+        """
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = statement_format(uploaded, request.data.get('format'))
+        if fmt is None:
+            return Response(
+                {'error': 'format must be csv or ndjson (or use a .csv / .ndjson file name)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        uploaded.seek(0)
+        results = (json.dumps(result, default=str) + '\n' for result in ingest_statement(uploaded.file, fmt))
+        return StreamingHttpResponse(results, content_type='application/x-ndjson')
+
     @action(detail=False, methods=['get'])
     def loan_payments(self, request):
         """Get all payments for a specific loan"""
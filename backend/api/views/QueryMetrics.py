@@ -0,0 +1,35 @@
+from django.conf import settings
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from ..middleware import recent_query_metrics
+
+
+class QueryMetricsViewSet(viewsets.ViewSet):
+    """
+    Debug view of per-request query counts, DB time and repeated statements
+    """
+
+    def list(self, request):
+        """
+        Get metrics for the most recent requests handled by this process
+        
+        Query params:
+            over_budget: 'true' to only show requests that exceeded their budget
+            path: Only show requests whose path starts with this prefix
+        """
+        if not settings.DEBUG:
+            return Response(
+                {'error': 'Query metrics are only available in DEBUG mode'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        metrics = recent_query_metrics()
+        
+        path = request.query_params.get('path')
+        if path:
+            metrics = [m for m in metrics if m['path'].startswith(path)]
+        
+        if request.query_params.get('over_budget') == 'true':
+            metrics = [m for m in metrics if m['budget'] is not None and m['view_query_count'] > m['budget']]
+        
+        return Response(metrics)
@@ -1,7 +1,7 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Q
+from django.db.models import Count, Sum, Q
 from datetime import date
 from ..models.Repayment import Repayment
 from ..serializers.Repayment import RepaymentSerializer
@@ -12,6 +12,7 @@ class RepaymentViewSet(viewsets.ModelViewSet):
     search_fields = ['loan__borrower__first_name', 'loan__borrower__last_name', 'status']
     ordering_fields = ['due_date', 'amount_due', 'created_at']
     filterset_fields = ['status', 'loan']
+    query_budgets = {'stats': 1}
 
     def get_queryset(self):
         """
@@ -34,7 +35,7 @@ class RepaymentViewSet(viewsets.ModelViewSet):
         if show_overdue == 'true':
             queryset = queryset.filter(
                 due_date__lt=date.today(),
-                status='PENDING'
+                status__in=Repayment.OPEN_STATUSES
             )
         
         return queryset
@@ -60,9 +61,11 @@ class RepaymentViewSet(viewsets.ModelViewSet):
         """
         Get overdue repayments
         """
+        # The nightly sweep marks overdue installments MISSED; PENDING ones
+        # are overdue installments it has not reached yet
         overdue_repayments = self.get_queryset().filter(
             due_date__lt=date.today(),
-            status='PENDING'
+            status__in=Repayment.OPEN_STATUSES
         )
         
         serializer = self.get_serializer(overdue_repayments, many=True)
@@ -96,30 +99,23 @@ class RepaymentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """
-        Get repayment statistics
+        Get repayment statistics, computed in one conditional aggregate query
         """
-        total_due = self.get_queryset().filter(
-            status='PENDING'
-        ).aggregate(total=Sum('amount_due'))['total'] or 0
-        
-        total_paid = self.get_queryset().exclude(
-            status='PENDING'
-        ).aggregate(total=Sum('amount_paid'))['total'] or 0
-        
-        overdue_count = self.get_queryset().filter(
-            due_date__lt=date.today(),
-            status='PENDING'
-        ).count()
-        
-        on_time_count = self.get_queryset().filter(status='ON_TIME').count()
-        late_count = self.get_queryset().filter(status='LATE').count()
-        missed_count = self.get_queryset().filter(status='MISSED').count()
-        
+        overdue = Q(due_date__lt=date.today(), status__in=Repayment.OPEN_STATUSES)
+        totals = self.get_queryset().aggregate(
+            # Missed installments are still owed
+            total_due=Sum('amount_due', filter=Q(status__in=Repayment.OPEN_STATUSES)),
+            total_paid=Sum('amount_paid', filter=~Q(status='PENDING')),
+            overdue_count=Count('id', filter=overdue),
+            on_time_count=Count('id', filter=Q(status='ON_TIME')),
+            late_count=Count('id', filter=Q(status='LATE')),
+            missed_count=Count('id', filter=Q(status='MISSED')),
+        )
         return Response({
-            'total_due': str(total_due),
-            'total_paid': str(total_paid),
-            'overdue_count': overdue_count,
-            'on_time_count': on_time_count,
-            'late_count': late_count,
-            'missed_count': missed_count
+            'total_due': str(totals['total_due'] or 0),
+            'total_paid': str(totals['total_paid'] or 0),
+            'overdue_count': totals['overdue_count'],
+            'on_time_count': totals['on_time_count'],
+            'late_count': totals['late_count'],
+            'missed_count': totals['missed_count']
         })
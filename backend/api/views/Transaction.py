@@ -3,11 +3,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
 from ..models.Transaction import Transaction
+from ..pagination import KeysetPagination
 from ..serializers.Transaction import TransactionSerializer
 
 class TransactionViewSet(viewsets.ModelViewSet):
     queryset = Transaction.objects.all().order_by('-created_at')
     serializer_class = TransactionSerializer
+    pagination_class = KeysetPagination
     search_fields = ['customer__first_name', 'customer__last_name', 'reference_number', 'transaction_type']
     ordering_fields = ['created_at', 'amount']
     filterset_fields = ['transaction_type', 'loan', 'customer']
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
 
     'chat',
@@ -56,6 +57,7 @@ ASGI_APPLICATION = 'backend.asgi.application'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,6 +68,12 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'backend.urls'
 
+# Query instrumentation (api.middleware.QueryMetricsMiddleware)
+# Turn QUERY_BUDGET_ENFORCE on in test settings to fail requests that exceed
+# the query_budgets declared on their viewset
+QUERY_BUDGET_ENFORCE = False
+QUERY_METRICS_HISTORY = 100
+
 # settings.py
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -85,6 +93,29 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Live dashboard WebSocket pushes are coalesced to at most this many per second
+DASHBOARD_LIVE_MAX_UPDATES_PER_SECOND = 2
+
+# Nightly overdue sweep (manage.py sweep_overdue_repayments)
+# Installments still PENDING more than OVERDUE_GRACE_DAYS after their due date
+# become MISSED and are charged LATE_PENALTY_RATE of the unpaid amount once;
+# borrowers are reminded PAYMENT_REMINDER_DAYS before an installment is due
+OVERDUE_GRACE_DAYS = 0
+LATE_PENALTY_RATE = '0.05'
+PAYMENT_REMINDER_DAYS = 3
+
+# Credit loss simulation (manage.py simulate_portfolio_losses)
+LOSS_GIVEN_DEFAULT = 0.45
+ASSET_CORRELATION = 0.12
+
+# Shared cache so dashboard cache versions and counters are consistent across workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
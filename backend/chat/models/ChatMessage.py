@@ -55,3 +55,6 @@ class ChatMessage(models.Model):
         verbose_name = 'Chat Message'
         verbose_name_plural = 'Chat Messages'
         db_table = 'chat_messages'
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
@@ -6,11 +6,13 @@ from rest_framework.decorators import action
 from rest_framework import status
 from django.db.models import Q
 from rest_framework.permissions import IsAuthenticated
+from api.pagination import KeysetPagination
 from api.utils.websocket_utils import send_chat_message
 
 class ChatMessageViewSet(viewsets.ModelViewSet):
     queryset = ChatMessage.objects.all().order_by('-created_at')
     serializer_class = ChatMessageSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
     search_fields = ['message_text', 'sender__first_name', 'sender__last_name']
     filterset_fields = ['conversation', 'sender', 'message_type', 'is_read', 'created_at']